@@ -0,0 +1,67 @@
+"""Accuracy/latency benchmark of the local categorization fast path against the Gemini path.
+
+Usage:
+    python -m benchmarks.bench_categorizer --input labeled.jsonl [--gemini-limit 50]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from cyberguard_core import classifier, config
+from tools.train_category_model import read_jsonl
+
+# Nearest-rank percentile of a list of latencies
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+# One result line: accuracy and, when latencies were measured, p50/p95
+def report(name, latencies, correct, total):
+    accuracy = correct / total if total else 0.0
+    line = f"{name:<22} n={total:<5} accuracy={accuracy:6.1%}"
+    if latencies:
+        line += f"  p50={percentile(latencies, 0.5) * 1000:9.2f} ms  p95={percentile(latencies, 0.95) * 1000:9.2f} ms"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare classify_locally with Gemini categorization on labeled tickets.")
+    parser.add_argument("--input", required=True, help="JSONL of labeled complaints (see tools.train_category_model)")
+    parser.add_argument("--threshold", type=float, default=config.LOCAL_CLASSIFIER_THRESHOLD)
+    parser.add_argument("--gemini-limit", type=int, default=0, help="also run this many tickets through Gemini (costs API calls)")
+    args = parser.parse_args()
+
+    records = [(data, label) for data, label in read_jsonl(args.input) if label in config.VALID_CATEGORIES]
+    model = classifier.get_category_model()
+
+    local_latencies, local_results = [], []
+    for data, label in records:
+        start = time.perf_counter()
+        category, confidence, _ = classifier.classify_locally(data, model)
+        local_latencies.append(time.perf_counter() - start)
+        local_results.append((category, confidence, label))
+
+    confident = [(c, label) for c, confidence, label in local_results if confidence >= args.threshold]
+    print(f"{len(records)} labeled tickets, model: {'loaded' if model else 'rules only'}, threshold {args.threshold}")
+    report("local (all)", local_latencies, sum(c == label for c, _, label in local_results), len(local_results))
+    report("local (confident)", [], sum(c == label for c, label in confident), len(confident))
+    print(f"{'fast-path coverage':<22} {len(confident) / len(records) if records else 0.0:6.1%} of tickets skip Gemini")
+
+    if args.gemini_limit:
+        # A fresh prompt cache keeps cached answers from flattering the Gemini latency
+        config.PROMPT_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "bench_prompt_cache.db")
+        sample = list(zip(records, local_results))[:args.gemini_limit]
+        gemini_latencies, gemini_correct, hybrid_correct = [], 0, 0
+        for (data, label), (local_category, confidence, _) in sample:
+            start = time.perf_counter()
+            category, _ = classifier.categorize_complaint(data, use_local=False)
+            gemini_latencies.append(time.perf_counter() - start)
+            gemini_correct += category == label
+            hybrid_correct += (local_category if confidence >= args.threshold else category) == label
+        report("gemini", gemini_latencies, gemini_correct, len(sample))
+        report("hybrid (fast path)", [], hybrid_correct, len(sample))
+
+if __name__ == "__main__":
+    main()
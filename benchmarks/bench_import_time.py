@@ -0,0 +1,75 @@
+"""Cold-start import profile of the CyberGuard engine, checked against a time budget.
+
+Usage:
+    python -m benchmarks.bench_import_time [--budget-ms 1500] [--top 15] [--runs 3]
+
+Each run imports the module (default: cyberguard_core) in a fresh interpreter under `python -X importtime`
+and reports the best total. The slowest direct imports are listed so a new eager import of a heavy library
+is easy to spot. Exits with status 1 when the budget is exceeded.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+# Loaded on first use only; finding one of these in a cold import means a lazy accessor was bypassed
+LAZY_MODULES = ("google.generativeai", "google.api_core", "grpc", "supabase", "reportlab", "speech_recognition", "pydub",
+                "pyaudio")
+
+# (module, cumulative microseconds, indent) per import of one cold `import module`
+def profile_import(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative_us, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+            entries.append((name, cumulative_us, indent))
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile and budget the cold import time of the CyberGuard engine.")
+    parser.add_argument("--module", default="cyberguard_core")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        entries = profile_import(args.module)
+        total_us = max(cumulative for name, cumulative, _ in entries if name == args.module)
+        if best is None or total_us < best[0]:
+            best = (total_us, entries)
+    total_us, entries = best
+
+    # -X importtime lists children before their parent, one indent level deeper: walk back from the module
+    position = max(i for i, (name, _, _) in enumerate(entries) if name == args.module)
+    module_indent = entries[position][2]
+    direct = []
+    for name, cumulative_us, indent in reversed(entries[:position]):
+        if indent <= module_indent:
+            break
+        if indent == module_indent + 2:
+            direct.append((cumulative_us, name))
+    top_level = sorted(direct, reverse=True)
+    print(f"{args.module}: {total_us / 1000:.1f} ms cold import (best of {args.runs}), budget {args.budget_ms:.0f} ms")
+    for cumulative_us, name in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+    loaded = {name for name, _, _ in entries}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager:
+        print(f"eagerly imported (should be lazy): {', '.join(eager)}")
+    if total_us / 1000 > args.budget_ms or eager:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
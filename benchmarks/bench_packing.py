@@ -0,0 +1,72 @@
+"""Throughput/token benchmark of packed categorization (K complaints per Gemini call) against one call per complaint.
+
+Usage:
+    python -m benchmarks.bench_packing --input labeled.jsonl --limit 64 --pack-sizes 2,4,8,16
+
+Token counts use the scheduler's estimate (characters / 4) for prompts and replies. Every run uses a fresh
+prompt cache and bypasses the local fast path, so each configuration pays for all of its Gemini calls.
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from cyberguard_core import classifier, config, gemini
+from tools.train_category_model import read_jsonl
+
+# Wraps the classifier's get_gemini_response to count calls and estimated prompt/reply tokens
+class CallMeter:
+    def __init__(self):
+        self.original = classifier.get_gemini_response
+        self.reset()
+
+    def reset(self):
+        self.calls = self.prompt_tokens = self.reply_tokens = 0
+
+    def __call__(self, prompt, *args, **kwargs):
+        response = self.original(prompt, *args, **kwargs)
+        self.calls += 1
+        self.prompt_tokens += len(prompt) // 4
+        self.reply_tokens += len(response or "") // 4
+        return response
+
+# Time one configuration on a fresh prompt cache and print its calls, throughput, tokens and accuracy
+def run(name, categorize, records, meter, min_calls):
+    config.PROMPT_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "bench_prompt_cache.db")
+    gemini.get_prompt_cache.cache_clear()
+    meter.reset()
+    start = time.perf_counter()
+    results = categorize([data for data, _ in records])
+    elapsed = time.perf_counter() - start
+    n = len(records)
+    correct = sum(category == label for (category, _), (_, label) in zip(results, records))
+    print(f"{name:<10} calls={meter.calls:<4} re-split={meter.calls - min_calls:<3} "
+          f"{n / elapsed * 3600 if elapsed else 0.0:9.0f} complaints/h  "
+          f"prompt tok/complaint={meter.prompt_tokens / n:7.0f}  reply tok/complaint={meter.reply_tokens / n:6.0f}  "
+          f"accuracy={correct / n:6.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare packed and per-complaint Gemini categorization.")
+    parser.add_argument("--input", required=True, help="JSONL of labeled complaints (see tools.train_category_model)")
+    parser.add_argument("--limit", type=int, default=32, help="complaints per configuration (costs API calls)")
+    parser.add_argument("--pack-sizes", default="2,4,8,16")
+    args = parser.parse_args()
+
+    records = [(data, label) for data, label in read_jsonl(args.input) if label in config.VALID_CATEGORIES]
+    records = records[:args.limit]
+    if not records:
+        parser.error("no labeled complaints in input")
+    meter = CallMeter()
+    classifier.get_gemini_response = meter
+    print(f"{len(records)} labeled complaints per configuration")
+
+    run("single", lambda complaints: [classifier.categorize_complaint(data, use_local=False) for data in complaints],
+        records, meter, len(records))
+    for k in [int(k) for k in args.pack_sizes.split(",")]:
+        run(f"packed K={k}",
+            lambda complaints: classifier.categorize_complaints_packed(complaints, use_local=False, pack_size=k),
+            records, meter, math.ceil(len(records) / k))
+
+if __name__ == "__main__":
+    main()
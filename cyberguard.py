@@ -1,89 +1,33 @@
+# Thin Streamlit front end: every complaint operation lives in the UI-free cyberguard_core package, which is
+# imported once per process, so a rerun only re-renders this page.
 import streamlit as st
-import google.generativeai as genai
-import speech_recognition as sr
-import pyaudio
-import datetime
-import uuid
-import io
-import base64
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from streamlit_option_menu import option_menu
 import os
 import tempfile
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-from supabase import create_client, Client
-from pydub import AudioSegment
-
-# Supabase Configuration
-supabase_url = # supabase_url#
-supabase_key =  # supabase_key#
-supabase: Client = create_client(supabase_url, supabase_key)
-
-# SMTP Configuration
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = # smtp_port#
-SMTP_EMAIL =# smtp_email#
-SMTP_PASSWORD = # smtp_password#
-
-# Initialize Gemini AI
-genai.configure(api_key=# api_key#)
-model = genai.GenerativeModel('gemini-1.5-flash')
-
-# Function to generate 5 tips using Gemini based on the category
-def generate_cybercrime_tips(category):
-    prompt = f"""
-    You are a cybersecurity expert tasked with providing practical and meaningful advice. Based on the cybercrime category '{category}', generate exactly 5 concise, actionable tips to help individuals avoid falling victim to this type of crime. Ensure the tips are specific to the category, easy to understand, and useful for the general public. Format the response as a numbered list (1-5) with no additional explanations or introductions beyond the tips themselves.
-
-    Category: {category}
-    """
-    response = get_gemini_response(prompt)
-    return response if response else "1. Be cautious online.\n2. Use strong passwords.\n3. Avoid suspicious links.\n4. Keep software updated.\n5. Report suspicious activity."
-
-# Function to send confirmation email with tips
-def send_confirmation_email(to_email, ticket_id, category):
-    try:
-        tips = generate_cybercrime_tips(category)
-        msg = MIMEMultipart()
-        msg['From'] = SMTP_EMAIL
-        msg['To'] = to_email
-        msg['Subject'] = f"CyberGuard AI - Complaint Confirmation (Ticket ID: {ticket_id})"
-
-        body = f"""
-        Dear User,
-
-        Thank you for submitting your complaint to CyberGuard AI - National Cyber Crime Reporting Portal.
-        Your complaint has been successfully registered with the following details:
-
-        Ticket ID: {ticket_id}
-        Date Filed: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-        Status: Under Investigation
-        Category: {category}
-
-        You can track the status of your complaint using the Ticket ID on our portal under 'Track Complaint'.
-        For any further assistance, please contact us at cybercrime@nic.in or call 1930.
-
-        **5 Tips to Avoid {category} Crimes:**
-        {tips}
-
-        Regards,
-        CyberGuard AI Team
-        National Cyber Crime Reporting Portal
-        """
-        msg.attach(MIMEText(body, 'plain'))
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_EMAIL, SMTP_PASSWORD)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        st.error(f"Failed to send confirmation email: {e}")
-        return False
+from streamlit_option_menu import option_menu
+from cyberguard_core import (
+    ChatSession,
+    CyberGuardError,
+    describe_email_status,
+    fetch_complaint,
+    fetch_ticket_summary,
+    file_complaint,
+    form_filling_questions,
+    generate_complaint_pdf,
+    get_outbox_workers,
+    get_question_text,
+    get_tips_catalog,
+    is_valid_ticket_id,
+    languages,
+    normalize_ticket_id,
+    process_chatbot_input,
+    register_user,
+    sign_in_user,
+    store_evidence_files,
+    stored_complaint_pdf_data,
+    transcribe_audio,
+)
+from cyberguard_core.gemini import get_gemini_response
+from cyberguard_core.language import tts_lang_codes
 
 # TTS function
 def speak_text(text, lang_code):
@@ -103,6 +47,7 @@ def speak_text(text, lang_code):
 
 # Improved STT function with retries and fallback
 def recognize_speech(language_code):
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     retries = 3
     for attempt in range(retries):
@@ -135,64 +80,11 @@ def recognize_speech(language_code):
     st.error("🎙️ Failed to recognize speech after multiple attempts. Please try typing or check your microphone.")
     return None
 
-# Gemini response function with improved error handling
-def get_gemini_response(prompt, file_path=None, mime_type=None):
-    try:
-        if file_path and mime_type:
-            with open(file_path, "rb") as file:
-                file_content = file.read()
-            response = model.generate_content([prompt, {"mime_type": mime_type, "data": file_content}])
-        else:
-            response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        st.error(f"Gemini API error: {e}")
-        return None
-
-# Translation function with caching
-@st.cache_data
-def translate_text(text, source_lang, target_lang):
-    if source_lang == target_lang or not text:
-        return text
-    try:
-        prompt = f"""
-        You are a precise language translator. Translate the following '{source_lang}' text into '{target_lang}' and return ONLY the translated text, nothing else—no explanations, no breakdowns, no notes. Use the appropriate script for the target language.
-        Text to translate: {text}
-        """
-        response = get_gemini_response(prompt)
-        return response
-    except Exception as e:
-        st.error(f"Translation error: {e}")
-        return text
-
-# Extract information using Gemini with improved prompting
-def extract_info_from_response(question, response):
-    prompt = f"""
-    You are an advanced information extraction system. Given the following question and user response, extract ONLY the relevant information as a plain string. Do not use brackets, '[Not Provided]', or any extra text—just the extracted value. If the response is incomplete or unclear, return only what can be confidently extracted; otherwise, return an empty string ('').
-
-    Question: {question}
-    Response: {response}
-
-    Extract:
-    - For "What is your full name and contact phone number?": the full name and phone number as a single string (e.g., "pruthviraj 544434")
-    - For "What is your email address?": the email address (e.g., "aakash@gmail.com")
-    - For "When did the incident occur?": the date and time (e.g., "12-03-2025 14:30")
-    - For "Can you describe what happened in detail?": the full description as provided
-    - For "Do you have any evidence...?": the evidence description as provided
-    - For yes/no questions: "yes" or "no" (lowercase); if unclear, return an empty string ('')
-    """
-    result = get_gemini_response(prompt)
-    return result if result else ""
-
 # Initialize session state
 def init_session_state():
     defaults = {
-        'chat_history': [],
-        'form_data': {},
-        'form_data_translated': {},
-        'complaint_tickets': {},
-        'questions_index': 0,
-        'chatbot_active': False,
+        'chat': ChatSession,
+        'complaint_tickets': dict,
         'speech_input': '',
         'last_spoken_index': -1,
         'voice_enabled': True,
@@ -204,58 +96,10 @@ def init_session_state():
     }
     for key, value in defaults.items():
         if key not in st.session_state:
-            st.session_state[key] = value
-
-init_session_state()
-
-# Language mappings
-languages = {
-    "Hindi": "hi-IN", "Konkani": "kok-IN", "Kannada": "kn-IN", "Dogri": "doi-IN",
-    "Bodo": "brx-IN", "Urdu": "ur-IN", "Tamil": "ta-IN", "Kashmiri": "ks-IN",
-    "Assamese": "as-IN", "Bengali": "bn-IN", "Marathi": "mr-IN", "Sindhi": "sd-IN",
-    "Maithili": "mai-IN", "Punjabi": "pa-IN", "Malayalam": "ml-IN", "Manipuri": "mni-IN",
-    "Telugu": "te-IN", "Sanskrit": "sa-IN", "Nepali": "ne-IN", "Santali": "sat-IN",
-    "Gujarati": "gu-IN", "Odia": "or-IN", "English": "en-IN"
-}
-tts_lang_codes = {k: v.split('-')[0] + '-' + v.split('-')[1].upper() for k, v in languages.items()}
-native_commands = {
-    "English": {"next": "next", "back": "back", "submit": "submit", "repeat": "repeat"},
-    "Hindi": {"next": "अगला", "back": "पीछे", "submit": "जमा करें", "repeat": "दोहराएं"},
-    "Tamil": {"next": "அடுத்து", "back": "பின்னால்", "submit": "சமர்ப்பி", "repeat": "மீண்டும்"},
-    "Telugu": {"next": "తదుపరి", "back": "వెనక్కి", "submit": "సమర్పించు", "repeat": "పునరావృతం"},
-    "Kannada": {"next": "ಮುಂದಿನ", "back": "ಹಿಂದೆ", "submit": "ಸಲ್ಲಿಸು", "repeat": "ಪುನರಾವರ್ತನೆ"},
-    "Malayalam": {"next": "അടുത്തത്", "back": "പിന്നോട്ട്", "submit": "സമർപ്പിക്കുക", "repeat": "ആവർത്തിക്കുക"},
-    "Marathi": {"next": "पुढील", "back": "मागे", "submit": "सादर करा", "repeat": "पुनरावृत्ती"},
-    "Bengali": {"next": "পরবর্তী", "back": "পিছনে", "submit": "জমা দিন", "repeat": "পুনরাবৃত্তি"},
-    "Gujarati": {"next": "આગળ", "back": "પાછળ", "submit": "સબમિટ કરો", "repeat": "પુનરાવર્તન"},
-    "Punjabi": {"next": "ਅਗਲਾ", "back": "ਪਿੱਛੇ", "submit": "ਜਮ੍ਹਾ ਕਰੋ", "repeat": "ਦੁਹਰਾਓ"},
-    "Dogri": {"next": "अगला", "back": "पिछे", "submit": "जमा करो", "repeat": "दुहराओ"},
-}
-
-# Updated Complaint Questionnaire
-form_filling_questions = [
-    {"field": "name_phone", "question": {"English": "What is your full name and contact phone number?"}, "required": True},
-    {"field": "email", "question": {"English": "What is your email address?"}, "required": True},
-    {"field": "incident_date", "question": {"English": "When did the incident occur? (Please provide the date and approximate time.)"}, "required": True},
-    {"field": "threat_harass_women_children", "question": {"English": "Have you or someone you know received threatening or harassing messages online specifically targeting women or children? Please answer with yes or no."}, "required": False, "type": "yes_no"},
-    {"field": "financial_scam", "question": {"English": "Have you experienced unauthorized financial transactions, phishing scams, or deceptive financial offers via online communications? Please answer with yes or no."}, "required": False, "type": "yes_no"},
-    {"field": "malware_ransomware", "question": {"English": "Has your computer system or network been compromised by malware, ransomware, or unauthorized access? Please answer with yes or no."}, "required": False, "type": "yes_no"},
-    {"field": "illegal_trafficking", "question": {"English": "Have you encountered online platforms or content facilitating illegal trafficking or sale of goods/services? Please answer with yes or no."}, "required": False, "type": "yes_no"},
-    {"field": "incident_description", "question": {"English": "Can you describe what happened in detail?"}, "required": True},
-    {"field": "evidence", "question": {"English": "Do you have any evidence such as screenshots, emails, or messages that support your report? Please describe and upload if available."}, "required": False, "type": "text_and_upload"},
-]
-
-# UI Config
-st.set_page_config(
-    page_title="CyberGuard AI - National Cyber Crime Reporting Portal",
-    page_icon="🛡️",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+            st.session_state[key] = value() if callable(value) else value
 
 # Custom CSS (unchanged)
-st.markdown(
-    """
+CUSTOM_CSS = """
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">
     <style>
     .stApp {
@@ -417,33 +261,7 @@ st.markdown(
         width: 100%;
     }
     </style>
-    """,
-    unsafe_allow_html=True
-)
-
-# Authentication Functions
-def register_user(username, password, email):
-    response = supabase.table('users').select('username').eq('username', username).execute()
-    if response.data:
-        return False, "Username already exists."
-
-    try:
-        supabase.table('users').insert({
-            'username': username,
-            'password': password,  # In production, hash the password
-            'email': email
-        }).execute()
-        return True, "Registered successfully! Please sign in."
-    except Exception as e:
-        return False, f"Registration failed: {str(e)}"
-
-def sign_in_user(username, password):
-    response = supabase.table('users').select('*').eq('username', username).eq('password', password).execute()
-    if response.data:
-        st.session_state.authenticated = True
-        st.session_state.current_page = 'dashboard'
-        return True, "Signed in successfully!"
-    return False, "Invalid credentials."
+"""
 
 # Sign In Page
 def sign_in_page():
@@ -464,6 +282,8 @@ def sign_in_page():
         if submit_button:
             success, message = sign_in_user(username, password)
             if success:
+                st.session_state.authenticated = True
+                st.session_state.current_page = 'dashboard'
                 st.success(message)
                 st.rerun()
             else:
@@ -519,240 +339,54 @@ def register_page():
         st.session_state.current_page = 'signin'
         st.rerun()
 
-# Supabase Integration for Complaint Storage
-def save_to_supabase(data, translated_data):
-    ticket_id = f"CYBER-{uuid.uuid4().hex[:8].upper()}"
-    complaint_data = {
-        "ticket_id": ticket_id,
-        "data": data,
-        "translated_data": translated_data,
-        "status": "Under Investigation",
-        "date_filed": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "last_updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
-    try:
-        supabase.table('complaints').insert(complaint_data).execute()
-        email = translated_data.get('email', '')
-        category = translated_data.get('category', 'Other')
-        if email and send_confirmation_email(email, ticket_id, category):
-            st.success(f"✅ Confirmation email with safety tips sent to {email}!")
-        else:
-            st.warning("Complaint saved, but email confirmation failed.")
-        return ticket_id
-    except Exception as e:
-        st.error(f"Failed to save to Supabase: {e}")
-        return None
-
-def fetch_complaint_from_supabase(ticket_id):
-    try:
-        response = supabase.table('complaints').select('*').eq('ticket_id', ticket_id).execute()
-        if response.data:
-            return response.data[0]
-        return None
-    except Exception as e:
-        st.error(f"Failed to fetch from Supabase: {e}")
-        return None
-
-# Generate PDF
-def generate_complaint_pdf(data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], alignment=1, spaceAfter=12)
-    story.append(Paragraph("CYBER CRIME COMPLAINT REPORT", title_style))
-    story.append(Spacer(1, 12))
-
-    complaint_data = [
-        ["Ticket Number", data.get('ticket_id', '')],
-        ["Date Filed", data.get('date_filed', '')],
-        ["Name and Phone", data.get('name_phone', '')],
-        ["Email Address", data.get('email', '')],
-        ["Incident Date", data.get('incident_date', '')],
-        ["Threat/Harassment to Women/Children", data.get('threat_harass_women_children', 'N/A')],
-        ["Financial Scam", data.get('financial_scam', 'N/A')],
-        ["Malware/Ransomware", data.get('malware_ransomware', 'N/A')],
-        ["Illegal Trafficking", data.get('illegal_trafficking', 'N/A')],
-        ["Incident Description", data.get('incident_description', '')],
-        ["Evidence Description", data.get('evidence', '')],
-        ["Category", data.get('category', 'N/A')],
-        ["Category Explanation", data.get('category_explanation', 'N/A')],
-        ["Status", data.get('status', '')],
-    ]
-
-    table = Table(complaint_data, colWidths=[150, 400])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 12))
-
-    footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=10, textColor=colors.grey, alignment=1)
-    story.append(Paragraph("This is an auto-generated document from CyberGuard AI Portal", footer_style))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-# Get question text with caching
-@st.cache_data
-def get_question_text(question_dict, lang):
-    if lang in question_dict:
-        return question_dict[lang]
-    english_text = question_dict.get("English", "")
-    translated_text = translate_text(english_text, "English", lang)
-    question_dict[lang] = translated_text
-    return translated_text
-
-# Analyze Image with Gemini
-def analyze_image(image_path):
-    prompt = "Analyze this image and describe its content relevant to a cybercrime complaint."
-    analysis = get_gemini_response(prompt, image_path, "image/jpeg")
-    return analysis if analysis else "No significant content detected in the image."
-
-# Check if audio has sound
-def has_sound(audio_path):
-    try:
-        audio = AudioSegment.from_file(audio_path)
-        return audio.dBFS > -60  # Threshold for detecting sound
-    except Exception as e:
-        st.error(f"Audio analysis error: {e}")
-        return False
-
-# Enhanced Categorization with Advanced Prompting
-def categorize_complaint(data):
-    complaint_text = "\n".join([f"{k}: {v}" for k, v in data.items() if k not in ['evidence_files', 'category', 'category_explanation']])
-    image_analyses = []
-    if 'evidence_files' in data:
-        for evidence in data['evidence_files']:
-            if evidence['name'].endswith(('.jpg', '.jpeg', '.png')):
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-                    temp_file.write(base64.b64decode(evidence['content']))
-                    temp_path = temp_file.name
-                analysis = analyze_image(temp_path)
-                image_analyses.append(f"Image {evidence['name']}: {analysis}")
-                os.unlink(temp_path)
-
-    prompt = f"""
-    You are an expert cybercrime analyst with advanced knowledge in digital forensics, behavioral analysis, and legal frameworks. Your task is to categorize the following complaint into one of these categories:
-    - Cyber Harassment
-    - Financial Fraud
-    - System Security
-    - Illegal Activities
-    - Other
-
-    Provide a precise and detailed explanation (6-10 sentences) justifying the chosen category, adhering to these enhanced steps:
-    1. Analyze each Yes/No response, assigning weighted relevance to potential categories based on severity and specificity.
-    2. Perform a semantic analysis of the incident description, identifying key phrases, intent, and contextual clues with high accuracy.
-    3. Integrate image analysis (if available) as corroborative evidence, assessing its relevance to the complaint narrative.
-    4. Cross-reference the combined data against known cybercrime patterns and typologies for consistency.
-    5. Resolve ambiguities by prioritizing the most specific and impactful evidence, avoiding generic assumptions.
-    6. Conclude with a clear, evidence-based rationale for the selected category, ensuring alignment with legal definitions.
-
-    Respond in this format:
-    Category: [category name]
-    Explanation: [detailed explanation]
+# Display chat message; `message` may also be an iterator of streamed chunks, rendered as they arrive.
+# Returns the full message text.
+def display_chat_message(message, is_user=False):
+    message_class = "user-message" if is_user else "bot-message"
+    if isinstance(message, str):
+        st.markdown(f'<div class="chat-message {message_class}">{message}</div>', unsafe_allow_html=True)
+        return message
+    placeholder = st.empty()
+    text = ""
+    for chunk in message:
+        text += chunk
+        placeholder.markdown(f'<div class="chat-message {message_class}">{text}▌</div>', unsafe_allow_html=True)
+    text = text.strip()
+    if text:
+        placeholder.markdown(f'<div class="chat-message {message_class}">{text}</div>', unsafe_allow_html=True)
+    else:
+        placeholder.empty()
+    return text
 
-    Complaint details:
-    {complaint_text}
+# Bot message placeholder for callback-style streaming; returns a function taking the text received so far.
+# Pass a placeholder the caller clears itself when the page is not rerun after the stream ends.
+def streaming_chat_message(placeholder=None):
+    placeholder = placeholder or st.empty()
+    return lambda text: placeholder.markdown(f'<div class="chat-message bot-message">{text}▌</div>', unsafe_allow_html=True)
 
-    Image Analysis (if any):
-    {"; ".join(image_analyses) if image_analyses else "No images provided."}
-    """
-    response = get_gemini_response(prompt)
+# File a complaint through the engine and surface its outcome; returns the Submission, or None on failure
+def submit_complaint(data, language, translated_data=None, on_chunk=None):
     try:
-        category_line, explanation_line = response.split('\n', 1)
-        category = category_line.split(": ")[1]
-        explanation = explanation_line.split(": ")[1]
-        valid_categories = ["Cyber Harassment", "Financial Fraud", "System Security", "Illegal Activities", "Other"]
-        return category if category in valid_categories else "Other", explanation
-    except Exception:
-        return "Other", "Failed to categorize due to an error in processing the response. Please ensure all details are complete and retry."
-
-# Process chatbot input with clean data storage
-def process_chatbot_input(user_input, audio_file, current_question):
-    lang = st.session_state.selected_language
-    commands = native_commands.get(lang, native_commands["English"])
-    question_text = get_question_text(current_question['question'], "English")
-
-    if audio_file:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            temp_file.write(audio_file.read())
-            temp_path = temp_file.name
-        if has_sound(temp_path):
-            user_input = get_gemini_response("Transcribe this audio:", temp_path, "audio/wav")
-            if not user_input:
-                user_input = "No recognizable speech in audio."
-        else:
-            os.unlink(temp_path)
-            st.warning("Uploaded audio has no sound. Please upload a valid audio file.")
-            return "No sound detected in audio."
-        os.unlink(temp_path)
-        st.session_state.speech_input = user_input
-
-    if user_input.lower() in [commands["next"], "next"]:
-        st.session_state.questions_index += 1
-        return None
-    elif user_input.lower() in [commands["back"], "back"]:
-        st.session_state.questions_index = max(0, st.session_state.questions_index - 1)
+        submission = file_complaint(data, language, translated_data, on_chunk=on_chunk)
+    except CyberGuardError as e:
+        st.error(str(e))
         return None
-    elif user_input.lower() in [commands["submit"], "submit"]:
-        st.session_state.chatbot_active = False
-        category, explanation = categorize_complaint(st.session_state.form_data_translated)
-        st.session_state.form_data['category'] = category
-        st.session_state.form_data['category_explanation'] = explanation
-        st.session_state.form_data_translated['category'] = category
-        st.session_state.form_data_translated['category_explanation'] = explanation
-        return f"All details collected. Complaint categorized as: {category}. Explanation: {explanation}"
-    elif user_input.lower() in [commands["repeat"], "repeat"]:
-        return get_question_text(current_question['question'], lang)
-
-    extracted_value = extract_info_from_response(question_text, user_input)
-    if current_question.get('type') == "yes_no":
-        if extracted_value in ["yes", "no"]:
-            st.session_state.form_data[current_question['field']] = extracted_value
-            st.session_state.form_data_translated[current_question['field']] = extracted_value
-            st.session_state.questions_index += 1
-        else:
-            return translate_text("Please respond with 'yes' or 'no'.", "English", lang)
-    elif current_question.get('type') == "text_and_upload":
-        st.session_state.form_data[current_question['field']] = extracted_value
-        st.session_state.form_data_translated[current_question['field']] = translate_text(extracted_value, lang, "English")
-        uploaded_files = st.file_uploader("Upload evidence here", accept_multiple_files=True, key=f"upload_{st.session_state.questions_index}")
-        if uploaded_files:
-            st.session_state.form_data['evidence_files'] = [{"name": f.name, "content": base64.b64encode(f.read()).decode('utf-8')} for f in uploaded_files]
-        st.session_state.questions_index += 1
-    else:
-        st.session_state.form_data[current_question['field']] = extracted_value
-        st.session_state.form_data_translated[current_question['field']] = translate_text(extracted_value, lang, "English")
-        st.session_state.questions_index += 1
-
-    if st.session_state.questions_index >= len(form_filling_questions):
-        st.session_state.chatbot_active = False
-        category, explanation = categorize_complaint(st.session_state.form_data_translated)
-        st.session_state.form_data['category'] = category
-        st.session_state.form_data['category_explanation'] = explanation
-        st.session_state.form_data_translated['category'] = category
-        st.session_state.form_data_translated['category_explanation'] = explanation
-        return f"Thank you for providing all the information. Complaint categorized as: {category}. Explanation: {explanation}"
-    return None
-
-# Display chat message
-def display_chat_message(message, is_user=False):
-    message_class = "user-message" if is_user else "bot-message"
-    st.markdown(f'<div class="chat-message {message_class}">{message}</div>', unsafe_allow_html=True)
+    if submission.email_queued:
+        st.info(f"📧 A confirmation email with safety tips will be sent to {submission.email} shortly.")
+    elif submission.email_error:
+        st.warning(f"Complaint saved, but the confirmation email could not be queued: {submission.email_error}")
+    return submission
+
+def show_submission(submission):
+    st.success(f"✅ Complaint filed successfully! Your ticket ID is: {submission.ticket_id}")
+    st.markdown(f"**Category Assigned:** {submission.record.get('category', 'N/A')}")
+    st.markdown(f"**Explanation:** {submission.record.get('category_explanation', 'N/A')}")
+    st.download_button(
+        label="Download Complaint PDF",
+        data=generate_complaint_pdf(submission.record),
+        file_name=f"Complaint_{submission.ticket_id}.pdf",
+        mime="application/pdf"
+    )
 
 # Main Dashboard
 def dashboard():
@@ -858,26 +492,27 @@ def dashboard():
             st.session_state.voice_pitch = st.slider("Pitch", 0.5, 2.0, 1.0)
             st.session_state.voice_rate = st.slider("Speed", 0.5, 2.0, 1.0)
 
+        chat = st.session_state.chat
+        chat.language = st.session_state.selected_language
         use_chatbot = st.checkbox("Use AI Chatbot to Fill Form", value=False)
         if use_chatbot:
-            st.session_state.chatbot_active = True
             st.markdown('<div class="chat-container">', unsafe_allow_html=True)
 
-            progress = st.session_state.questions_index / len(form_filling_questions) * 100
+            progress = chat.progress * 100
             st.markdown(f'<div class="progress-bar"><div class="progress-fill" style="width:{progress}%"></div></div>', unsafe_allow_html=True)
 
-            for chat in st.session_state.chat_history:
-                display_chat_message(chat['message'], chat['is_user'])
+            for message in chat.chat_history:
+                display_chat_message(message['message'], message['is_user'])
 
-            if st.session_state.chatbot_active and st.session_state.questions_index < len(form_filling_questions):
-                current_question = form_filling_questions[st.session_state.questions_index]
+            current_question = chat.current_question
+            if current_question is not None:
                 with st.spinner("Loading question..."):
-                    q_text = get_question_text(current_question['question'], st.session_state.selected_language)
+                    q_text = get_question_text(current_question['question'], chat.language)
 
-                if st.session_state.voice_enabled and st.session_state.questions_index > st.session_state.last_spoken_index:
-                    st.info(f"🔊 Speaking in {st.session_state.selected_language}...")
+                if st.session_state.voice_enabled and chat.questions_index > st.session_state.last_spoken_index:
+                    st.info(f"🔊 Speaking in {chat.language}...")
                     speak_text(q_text, tts_lang)
-                    st.session_state.last_spoken_index = st.session_state.questions_index
+                    st.session_state.last_spoken_index = chat.questions_index
 
                 display_chat_message(q_text)
 
@@ -886,10 +521,10 @@ def dashboard():
                     user_input = st.text_input(
                         "Your response",
                         value=st.session_state.speech_input,
-                        key=f"chat_input_{st.session_state.questions_index}"
+                        key=f"chat_input_{chat.questions_index}"
                     )
                 with col2:
-                    if st.button("🎙️", key=f"mic_{st.session_state.questions_index}"):
+                    if st.button("🎙️", key=f"mic_{chat.questions_index}"):
                         with st.spinner("Processing speech..."):
                             speech_text = recognize_speech(language_code)
                         if speech_text:
@@ -899,21 +534,30 @@ def dashboard():
                 audio_file = st.file_uploader(
                     "Upload Audio Response",
                     type=["wav", "mp3"],
-                    key=f"audio_{st.session_state.questions_index}",
+                    key=f"audio_{chat.questions_index}",
                     help="Upload an audio file as your response (max 5MB)",
                     label_visibility="visible"
                 )
+                evidence_uploads = None
+                if current_question.get('type') == "text_and_upload":
+                    evidence_uploads = st.file_uploader("Upload evidence here", accept_multiple_files=True, key=f"upload_{chat.questions_index}")
 
                 if user_input or audio_file:
                     with st.spinner("Processing your response..."):
                         final_input = user_input if user_input else ""
                         if audio_file:
-                            final_input = process_chatbot_input("", audio_file, current_question) or final_input
+                            transcript = transcribe_audio(audio_file.read())
+                            if transcript is None:
+                                st.warning("Uploaded audio has no sound. Please upload a valid audio file.")
+                            else:
+                                final_input = display_chat_message(transcript, is_user=True) or "No recognizable speech in audio."
+                                st.session_state.speech_input = final_input
                         if final_input:
-                            display_chat_message(final_input, is_user=True)
-                            st.session_state.chat_history.append({"message": q_text, "is_user": False})
-                            st.session_state.chat_history.append({"message": final_input, "is_user": True})
-                            response = process_chatbot_input(final_input, None, current_question)
+                            if not audio_file:
+                                display_chat_message(final_input, is_user=True)
+                            chat.record_exchange(q_text, final_input)
+                            evidence_files = store_evidence_files(evidence_uploads) if evidence_uploads else None
+                            response = process_chatbot_input(chat, final_input, evidence_files, on_chunk=streaming_chat_message())
                             if response:
                                 display_chat_message(response)
                             st.session_state.speech_input = ""
@@ -921,53 +565,36 @@ def dashboard():
 
             st.markdown('</div>', unsafe_allow_html=True)
 
-            if not st.session_state.chatbot_active:
+            if not chat.active:
                 st.success("✅ Complaint data collected successfully.")
-                # Removed Collected Details display
-                st.markdown(f"**Category Assigned:** {st.session_state.form_data.get('category', 'N/A')}")
-                st.markdown(f"**Explanation:** {st.session_state.form_data.get('category_explanation', 'N/A')}")
+                st.markdown(f"**Category Assigned:** {chat.form_data.get('category', 'N/A')}")
+                st.markdown(f"**Explanation:** {chat.form_data.get('category_explanation', 'N/A')}")
                 if st.button("Submit Complaint", key="chatbot_submit"):
                     with st.spinner("Submitting your complaint..."):
-                        ticket_id = save_to_supabase(st.session_state.form_data, st.session_state.form_data_translated)
-                        if ticket_id:
-                            st.session_state.form_data['ticket_id'] = ticket_id
-                            st.session_state.form_data_translated['ticket_id'] = ticket_id
-                            st.session_state.form_data_translated.update({
-                                "status": "Under Investigation",
-                                "date_filed": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            })
-                            pdf_buffer = generate_complaint_pdf(st.session_state.form_data_translated)
-                            st.success(f"✅ Complaint filed successfully! Your ticket ID is: {ticket_id}")
-                            st.download_button(
-                                label="Download Complaint PDF",
-                                data=pdf_buffer,
-                                file_name=f"Complaint_{ticket_id}.pdf",
-                                mime="application/pdf"
-                            )
-                            st.session_state.form_data = {}
-                            st.session_state.form_data_translated = {}
-                            st.session_state.chat_history = []
-                            st.session_state.questions_index = 0
+                        submission = submit_complaint(chat.form_data, chat.language, chat.form_data_translated)
+                        if submission:
+                            show_submission(submission)
+                            chat.reset()
 
-        if not use_chatbot or not st.session_state.chatbot_active:
+        if not use_chatbot or not chat.active:
             with st.form(key='complaint_form'):
                 col1, col2 = st.columns(2)
                 with col1:
-                    name_phone = st.text_input("Full Name and Phone Number", value=st.session_state.form_data.get('name_phone', ''))
-                    email = st.text_input("Email Address", value=st.session_state.form_data.get('email', ''))
-                    incident_date = st.text_input("Incident Date & Time (e.g., DD-MM-YYYY HH:MM)", value=st.session_state.form_data.get('incident_date', ''))
+                    name_phone = st.text_input("Full Name and Phone Number", value=chat.form_data.get('name_phone', ''))
+                    email = st.text_input("Email Address", value=chat.form_data.get('email', ''))
+                    incident_date = st.text_input("Incident Date & Time (e.g., DD-MM-YYYY HH:MM)", value=chat.form_data.get('incident_date', ''))
                     threat_harass = st.selectbox("Threat/Harassment to Women/Children", ["No", "Yes"],
-                                                index=0 if st.session_state.form_data.get('threat_harass_women_children', 'no') == 'no' else 1)
+                                                index=0 if chat.form_data.get('threat_harass_women_children', 'no') == 'no' else 1)
                     financial_scam = st.selectbox("Financial Scam", ["No", "Yes"],
-                                                 index=0 if st.session_state.form_data.get('financial_scam', 'no') == 'no' else 1)
+                                                 index=0 if chat.form_data.get('financial_scam', 'no') == 'no' else 1)
                 with col2:
                     malware = st.selectbox("Malware/Ransomware", ["No", "Yes"],
-                                          index=0 if st.session_state.form_data.get('malware_ransomware', 'no') == 'no' else 1)
+                                          index=0 if chat.form_data.get('malware_ransomware', 'no') == 'no' else 1)
                     illegal_trafficking = st.selectbox("Illegal Trafficking", ["No", "Yes"],
-                                                      index=0 if st.session_state.form_data.get('illegal_trafficking', 'no') == 'no' else 1)
+                                                      index=0 if chat.form_data.get('illegal_trafficking', 'no') == 'no' else 1)
 
-                incident_description = st.text_area("Incident Description", value=st.session_state.form_data.get('incident_description', ''), height=200)
-                evidence = st.text_area("Evidence Description (e.g., screenshots, emails, messages)", value=st.session_state.form_data.get('evidence', ''))
+                incident_description = st.text_area("Incident Description", value=chat.form_data.get('incident_description', ''), height=200)
+                evidence = st.text_area("Evidence Description (e.g., screenshots, emails, messages)", value=chat.form_data.get('evidence', ''))
                 evidence_files = st.file_uploader("Upload Evidence (Screenshots, Documents, etc.)", accept_multiple_files=True, type=['jpg', 'png', 'pdf', 'docx'])
 
                 submit_button = st.form_submit_button(label='Submit Complaint')
@@ -999,33 +626,14 @@ def dashboard():
                             "evidence_files": []
                         }
                         if evidence_files:
-                            complaint_data["evidence_files"] = [{"name": f.name, "content": base64.b64encode(f.read()).decode('utf-8')} for f in evidence_files]
-                        category, explanation = categorize_complaint(complaint_data)
-                        complaint_data["category"] = category
-                        complaint_data["category_explanation"] = explanation
-                        translated_data = {k: translate_text(v, st.session_state.selected_language, "English") for k, v in complaint_data.items()}
-                        ticket_id = save_to_supabase(complaint_data, translated_data)
-                        if ticket_id:
-                            translated_data["ticket_id"] = ticket_id
-                            translated_data.update({
-                                "status": "Under Investigation",
-                                "date_filed": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            })
-                            pdf_buffer = generate_complaint_pdf(translated_data)
-                            st.success(f"✅ Complaint filed successfully! Your ticket ID is: {ticket_id}")
-                            # Removed Collected Details display
-                            st.markdown(f"**Category Assigned:** {category}")
-                            st.markdown(f"**Explanation:** {explanation}")
-                            st.download_button(
-                                label="Download Complaint PDF",
-                                data=pdf_buffer,
-                                file_name=f"Complaint_{ticket_id}.pdf",
-                                mime="application/pdf"
-                            )
-                            st.session_state.form_data = {}
-                            st.session_state.form_data_translated = {}
-                            st.session_state.chat_history = []
-                            st.session_state.questions_index = 0
+                            complaint_data["evidence_files"] = store_evidence_files(evidence_files)
+                        # The streamed categorization is only a progress indicator: show_submission reports the result
+                        category_placeholder = st.empty()
+                        submission = submit_complaint(complaint_data, chat.language, on_chunk=streaming_chat_message(category_placeholder))
+                        category_placeholder.empty()
+                        if submission:
+                            show_submission(submission)
+                            chat.reset()
 
     elif selected == "Track Complaint":
         st.markdown('<i class="fas fa-search big-icon"></i>', unsafe_allow_html=True)
@@ -1039,11 +647,18 @@ def dashboard():
             unsafe_allow_html=True
         )
 
-        ticket_id = st.text_input("Enter Ticket ID (e.g., CYBER-XXXXXXXX)", "").upper()
-        if ticket_id:
-            ticket_data = fetch_complaint_from_supabase(ticket_id)
+        ticket_id = normalize_ticket_id(st.text_input("Enter Ticket ID (e.g., CYBER-01HZX3K8Q5M2V7C9T4N6B1R0WAG)", ""))
+        if ticket_id and not is_valid_ticket_id(ticket_id):
+            st.error("This ticket ID is not valid. Please check it for typos against your confirmation email.")
+        elif ticket_id:
+            ticket_data, lookup_failed = None, False
+            try:
+                ticket_data = fetch_ticket_summary(ticket_id)
+            except CyberGuardError as e:
+                st.error(str(e))
+                lookup_failed = True
             if ticket_data:
-                status_class = "status-pending" if ticket_data['status'] == "Under Investigation" else "status-resolved"
+                status_class = {"Under Investigation": "status-pending", "Assigned": "status-active"}.get(ticket_data['status'], "status-resolved")
                 st.markdown(
                     f"""
                     <div class="content-card">
@@ -1052,20 +667,32 @@ def dashboard():
                         <p><strong>Status:</strong> <span class="status-badge {status_class}">{ticket_data['status']}</span></p>
                         <p><strong>Date Filed:</strong> {ticket_data['date_filed']}</p>
                         <p><strong>Last Updated:</strong> {ticket_data['last_updated']}</p>
-                        <p><strong>Category:</strong> {ticket_data['translated_data'].get('category', 'N/A')}</p>
-                        <p><strong>Category Explanation:</strong> {ticket_data['translated_data'].get('category_explanation', 'N/A')}</p>
+                        <p><strong>Category:</strong> {ticket_data.get('category') or 'N/A'}</p>
+                        <p><strong>Category Explanation:</strong> {ticket_data.get('category_explanation') or 'N/A'}</p>
+                        <p><strong>Confirmation Email:</strong> {describe_email_status(ticket_id)}</p>
                     </div>
                     """,
                     unsafe_allow_html=True
                 )
-                pdf_buffer = generate_complaint_pdf(ticket_data['translated_data'])
-                st.download_button(
-                    label="Download Complaint PDF",
-                    data=pdf_buffer,
-                    file_name=f"Complaint_{ticket_id}.pdf",
-                    mime="application/pdf"
-                )
-            else:
+                # The full record (with the complaint blobs) is only fetched when the user asks for the PDF
+                pdf_key = (ticket_id, ticket_data['last_updated'])
+                if st.session_state.get('track_pdf_key') != pdf_key and st.button("Prepare Complaint PDF"):
+                    try:
+                        full_record = fetch_complaint(ticket_id)
+                    except CyberGuardError as e:
+                        st.error(str(e))
+                        full_record = None
+                    if full_record:
+                        st.session_state.track_pdf = generate_complaint_pdf(stored_complaint_pdf_data(full_record)).getvalue()
+                        st.session_state.track_pdf_key = pdf_key
+                if st.session_state.get('track_pdf_key') == pdf_key:
+                    st.download_button(
+                        label="Download Complaint PDF",
+                        data=st.session_state.track_pdf,
+                        file_name=f"Complaint_{ticket_id}.pdf",
+                        mime="application/pdf"
+                    )
+            elif not lookup_failed:
                 st.error("❌ Invalid Ticket ID. Please check and try again.")
 
     elif selected == "Contact Us":
@@ -1094,11 +721,25 @@ def dashboard():
         unsafe_allow_html=True
     )
 
-# Main App Logic
-if not st.session_state.authenticated:
-    if st.session_state.current_page == 'signin':
-        sign_in_page()
-    elif st.session_state.current_page == 'register':
-        register_page()
-else:
-    dashboard()
\ No newline at end of file
+# Main App Logic (streamlit runs this file as __main__; importing it only loads the functions)
+def main():
+    init_session_state()
+    st.set_page_config(
+        page_title="CyberGuard AI - National Cyber Crime Reporting Portal",
+        page_icon="🛡️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    get_tips_catalog()
+    get_outbox_workers()
+    if not st.session_state.authenticated:
+        if st.session_state.current_page == 'signin':
+            sign_in_page()
+        elif st.session_state.current_page == 'register':
+            register_page()
+    else:
+        dashboard()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""UI-free CyberGuard complaint engine.
+
+The Streamlit app (cyberguard.py), the HTTP API (cyberguard_core.api) and the offline tools all run on this
+package. Nothing here imports Streamlit: state lives in explicit objects such as ChatSession, and failures are
+raised as CyberGuardError subclasses or logged, never rendered.
+"""
+from .errors import CyberGuardError, GeminiUnavailableError, StorageError
+from .accounts import register_user, sign_in_user
+from .chatbot import ChatSession, process_chatbot_input, transcribe_audio
+from .classifier import categorize_complaint, categorize_complaints_packed, classify_locally
+from .evidence import store_evidence_files
+from .language import form_filling_questions, get_question_text, languages, translate_batch, translate_text
+from .notifications import describe_email_status, get_outbox_workers, get_tips_catalog
+from .pdf import generate_complaint_pdf, stored_complaint_pdf_data
+from .replica import get_replica, get_replica_syncer
+from .storage import get_repository
+from .tickets import (
+    Submission,
+    fetch_complaint,
+    fetch_ticket_summary,
+    file_complaint,
+    is_valid_ticket_id,
+    normalize_ticket_id,
+    update_complaint_status,
+    update_complaint_statuses,
+)
+from .workqueue import get_work_queue, transition
+
+__all__ = [
+    "ChatSession", "CyberGuardError", "GeminiUnavailableError", "StorageError", "Submission", "categorize_complaint",
+    "categorize_complaints_packed", "classify_locally", "describe_email_status", "fetch_complaint",
+    "fetch_ticket_summary", "file_complaint", "form_filling_questions", "generate_complaint_pdf", "get_outbox_workers",
+    "get_question_text", "get_replica", "get_replica_syncer", "get_repository", "get_tips_catalog", "get_work_queue",
+    "is_valid_ticket_id", "languages", "normalize_ticket_id", "process_chatbot_input", "register_user", "sign_in_user",
+    "store_evidence_files", "stored_complaint_pdf_data", "transcribe_audio", "transition", "translate_batch", "translate_text",
+    "update_complaint_status", "update_complaint_statuses",
+]
@@ -0,0 +1,19 @@
+"""User registration and sign-in."""
+from .storage import get_repository
+
+# Authentication Functions
+def register_user(username, password, email):
+    repository = get_repository()
+    if repository.user_exists(username):
+        return False, "Username already exists."
+
+    try:
+        repository.insert_user(username, password, email)
+        return True, "Registered successfully! Please sign in."
+    except Exception as e:
+        return False, f"Registration failed: {str(e)}"
+
+def sign_in_user(username, password):
+    if get_repository().check_credentials(username, password):
+        return True, "Signed in successfully!"
+    return False, "Invalid credentials."
@@ -0,0 +1,337 @@
+"""Optional JSON-over-HTTP API on the CyberGuard engine (standard library only).
+
+Usage:
+    python -m cyberguard_core.api --host 0.0.0.0 --port 8080
+
+Endpoints:
+    GET  /healthz                      liveness
+    GET  /metrics                      Gemini, outbox, cache, storage, replica and work queue counters
+    POST /categorize                   {"data": {...}} or {"complaints": [...], "pack_size": 8}
+    POST /complaints                   {"data": {...}, "language": "English"} -> ticket ID and category
+    GET  /complaints/<ticket_id>       status summary
+    GET  /complaints/<ticket_id>/pdf   complaint PDF
+    GET  /admin/complaints             filtered page from the read replica: ?status=&category=&assigned_to=&filed_from=
+                                       &filed_before=&sort=date_filed|last_updated&order=desc|asc&limit=50&offset=0
+    GET  /admin/stats                  replica counts by status and category (same filters)
+    GET  /admin/queue                  highest-priority open tickets: ?limit=20
+    POST /admin/queue/claim            {"assignee": "inspector.rao", "count": 5} -> tickets now assigned to them
+    POST /admin/complaints/status      {"ticket_ids": [...], "status": "Resolved", "from_statuses": ["Assigned"]}
+
+The /complaints endpoints require "Authorization: Basic <username:password>" of an account registered in the app,
+which also requires sign-in before filing or tracking. Lookups by legacy CYBER-XXXXXXXX IDs are rate-limited per account.
+Admin endpoints require "Authorization: Bearer <config.ADMIN_API_TOKEN>" and are disabled while it is empty.
+
+Runs alongside (or instead of) the Streamlit app, so categorization and filing can be scaled out on separate
+workers behind a load balancer.
+"""
+import argparse
+import base64
+import binascii
+import collections
+import functools
+import hmac
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote
+
+from . import config
+from .classifier import categorize_complaint, categorize_complaints_packed
+from .errors import CyberGuardError
+from .gemini import get_gemini_client, get_gemini_scheduler
+from .notifications import get_outbox_metrics, get_outbox_workers
+from .pdf import generate_complaint_pdf, get_pdf_cache, stored_complaint_pdf_data
+from .replica import get_replica, get_replica_syncer
+from .storage import get_repository
+from .tickets import (
+    LEGACY_TICKET_PATTERN,
+    fetch_complaint,
+    fetch_ticket_summary,
+    file_complaint,
+    get_ticket_cache,
+    is_valid_ticket_id,
+    normalize_ticket_id,
+)
+from .workqueue import ADMIN_STATUSES, get_work_queue, transition
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 500
+
+class ApiError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+# Sliding one-minute window of lookups per key (here: per account)
+class RateLimiter:
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._calls = collections.defaultdict(collections.deque)
+
+    def allow(self, key):
+        now = time.monotonic()
+        with self._lock:
+            calls = self._calls[key]
+            while calls and calls[0] <= now - 60:
+                calls.popleft()
+            if len(calls) >= self.per_minute:
+                self.rejected += 1
+                return False
+            calls.append(now)
+            return True
+
+@functools.cache
+def get_legacy_lookup_limiter():
+    return RateLimiter(config.LEGACY_TICKET_LOOKUPS_PER_MINUTE)
+
+def metrics():
+    return {
+        "gemini": get_gemini_client().snapshot(),
+        "scheduler": get_gemini_scheduler().snapshot(),
+        "outbox": get_outbox_metrics(),
+        "ticket_cache": get_ticket_cache().snapshot(),
+        "pdf_cache": get_pdf_cache().snapshot(),
+        "storage": get_repository().snapshot(),
+        "replica": get_replica().snapshot(),
+        "work_queue": get_work_queue().snapshot(),
+        "legacy_lookups_rejected": get_legacy_lookup_limiter().rejected,
+    }
+
+def categorize(body):
+    if "complaints" in body:
+        complaints = body["complaints"]
+        if not isinstance(complaints, list) or not all(isinstance(c, dict) for c in complaints):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "complaints must be a list of objects")
+        pack_size = body.get("pack_size", config.CATEGORIZE_PACK_SIZE)
+        if not isinstance(pack_size, int) or pack_size < 1:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "pack_size must be a positive integer")
+        results = categorize_complaints_packed(complaints, pack_size=pack_size)
+        return {"results": [{"category": c, "category_explanation": e} for c, e in results]}
+    category, explanation = categorize_complaint(complaint_payload(body))
+    return {"category": category, "category_explanation": explanation}
+
+def complaint_payload(body):
+    data = body.get("data")
+    if not isinstance(data, dict) or not data:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "data must be a non-empty object")
+    return data
+
+def replica_filters(query):
+    return {name: query[name] for name in ("status", "category", "assigned_to", "filed_from", "filed_before") if query.get(name)}
+
+def int_param(query, name, default, maximum):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if not 0 <= value <= maximum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be between 0 and {maximum}")
+    return value
+
+def admin_complaints(query):
+    filters = replica_filters(query)
+    sort = query.get("sort", "date_filed")
+    if sort not in ("date_filed", "last_updated"):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "sort must be date_filed or last_updated")
+    replica = get_replica()
+    return {
+        "total": replica.count(**filters),
+        "items": replica.query(limit=int_param(query, "limit", 50, MAX_PAGE_SIZE), offset=int_param(query, "offset", 0, 10 ** 9),
+                               sort=sort, descending=query.get("order", "desc") != "asc", **filters),
+    }
+
+def admin_stats(query):
+    filters = replica_filters(query)
+    replica = get_replica()
+    return {"by_status": replica.counts_by("status", **filters), "by_category": replica.counts_by("category", **filters)}
+
+def admin_claim(body):
+    assignee = body.get("assignee")
+    if not isinstance(assignee, str) or not assignee.strip():
+        raise ApiError(HTTPStatus.BAD_REQUEST, "assignee must be a non-empty string")
+    count = body.get("count", 1)
+    if not isinstance(count, int) or not 1 <= count <= MAX_PAGE_SIZE:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"count must be between 1 and {MAX_PAGE_SIZE}")
+    return {"claimed": get_work_queue().claim(assignee.strip(), count)}
+
+def admin_status(body):
+    ticket_ids, status, from_statuses = body.get("ticket_ids"), body.get("status"), body.get("from_statuses")
+    if not isinstance(ticket_ids, list) or not all(isinstance(t, str) for t in ticket_ids):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "ticket_ids must be a list of ticket IDs")
+    if status not in ADMIN_STATUSES:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"status must be one of {', '.join(ADMIN_STATUSES)}")
+    if from_statuses is not None and (not isinstance(from_statuses, list) or not set(from_statuses) <= set(ADMIN_STATUSES)):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"from_statuses must be a list of {', '.join(ADMIN_STATUSES)}")
+    ticket_ids = [normalize_ticket_id(ticket_id) for ticket_id in ticket_ids]
+    updated = transition(ticket_ids, status, from_statuses)
+    return {"updated": updated, "skipped": [ticket_id for ticket_id in ticket_ids if ticket_id not in set(updated)]}
+
+# Account named by HTTP Basic credentials, checked the way the app's sign-in checks them
+def authenticated_user(authorization):
+    scheme, _, encoded = authorization.partition(" ")
+    try:
+        username, separator, password = base64.b64decode(encoded, validate=True).decode("utf-8").partition(":")
+    except (binascii.Error, UnicodeDecodeError):
+        separator = ""
+    if scheme.lower() != "basic" or not separator or not get_repository().check_credentials(username, password):
+        raise ApiError(HTTPStatus.UNAUTHORIZED, "sign-in required", {"WWW-Authenticate": 'Basic realm="CyberGuard"'})
+    return username
+
+def ticket_id_from(raw, username):
+    ticket_id = normalize_ticket_id(unquote(raw))
+    if not is_valid_ticket_id(ticket_id):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "invalid ticket ID")
+    if LEGACY_TICKET_PATTERN.fullmatch(ticket_id) and not get_legacy_lookup_limiter().allow(username):
+        raise ApiError(HTTPStatus.TOO_MANY_REQUESTS, "too many lookups by legacy ticket ID; try again in a minute")
+    return ticket_id
+
+class CyberGuardHandler(BaseHTTPRequestHandler):
+    server_version = "CyberGuardAPI/1.0"
+
+    def do_GET(self):
+        self.dispatch(self.route_get)
+
+    def do_POST(self):
+        self.dispatch(self.route_post)
+
+    def route_get(self, parts):
+        if parts == ["healthz"]:
+            return {"status": "ok"}
+        if parts == ["metrics"]:
+            return metrics()
+        if parts[:1] == ["admin"]:
+            return self.route_admin(parts[1:])
+        if parts[:1] == ["complaints"]:
+            return self.route_complaint(parts[1:], authenticated_user(self.headers.get("Authorization", "")))
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+    # Tracking endpoints; like the app's Track page they need a signed-in account
+    def route_complaint(self, parts, username):
+        if len(parts) == 1:
+            summary = fetch_ticket_summary(ticket_id_from(parts[0], username))
+            if summary is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, "ticket not found")
+            return summary
+        if len(parts) == 2 and parts[1] == "pdf":
+            record = fetch_complaint(ticket_id_from(parts[0], username))
+            if record is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, "ticket not found")
+            pdf = generate_complaint_pdf(stored_complaint_pdf_data(record)).getvalue()
+            self.send_body(HTTPStatus.OK, pdf, "application/pdf")
+            return None
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+    def route_admin(self, parts):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not config.ADMIN_API_TOKEN or not hmac.compare_digest(token, config.ADMIN_API_TOKEN):
+            raise ApiError(HTTPStatus.FORBIDDEN, "admin access denied")
+        get_replica_syncer()
+        if self.command == "POST":
+            body = self.read_json()
+            if parts == ["queue", "claim"]:
+                return admin_claim(body)
+            if parts == ["complaints", "status"]:
+                return admin_status(body)
+        elif parts == ["complaints"]:
+            return admin_complaints(self.query)
+        elif parts == ["stats"]:
+            return admin_stats(self.query)
+        elif parts == ["queue"]:
+            return {"tickets": get_work_queue().peek(int_param(self.query, "limit", 20, MAX_PAGE_SIZE))}
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+    def route_post(self, parts):
+        if parts[:1] == ["admin"]:
+            return self.route_admin(parts[1:])
+        if parts == ["complaints"]:
+            authenticated_user(self.headers.get("Authorization", ""))
+        body = self.read_json()
+        if parts == ["categorize"]:
+            return categorize(body)
+        if parts == ["complaints"]:
+            submission = file_complaint(complaint_payload(body), body.get("language", "English"))
+            self.send_json(HTTPStatus.CREATED, {
+                "ticket_id": submission.ticket_id,
+                "category": submission.record.get('category'),
+                "category_explanation": submission.record.get('category_explanation'),
+                "email_queued": submission.email_queued,
+            })
+            return None
+        raise ApiError(HTTPStatus.NOT_FOUND, "no such endpoint")
+
+    def dispatch(self, route):
+        path, _, query = self.path.partition("?")
+        parts = [part for part in path.split("/") if part]
+        self.query = {name: values[-1] for name, values in parse_qs(query).items()}
+        try:
+            result = route(parts)
+            if result is not None:
+                self.send_json(HTTPStatus.OK, result)
+        except ApiError as e:
+            self.send_json(e.status, {"error": str(e)}, e.headers)
+        except CyberGuardError as e:
+            self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+        except Exception:
+            logger.exception("Unhandled API error for %s %s", self.command, self.path)
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+
+    def read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "body must be JSON")
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+        return body
+
+    def send_json(self, status, payload, headers=None):
+        self.send_body(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the CyberGuard engine over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    get_outbox_workers()
+    if config.ADMIN_API_TOKEN:
+        get_replica_syncer()
+    server = ThreadingHTTPServer((args.host, args.port), CyberGuardHandler)
+    logger.info("CyberGuard API listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Chatbot form filling over an explicit per-user ChatSession."""
+import dataclasses
+import os
+import tempfile
+
+from . import config
+from .gemini import stream_gemini_response
+from .language import (
+    extract_and_translate,
+    extract_info_locally,
+    form_filling_questions,
+    get_question_text,
+    native_commands,
+    needs_translation,
+    translate_text,
+)
+from .evidence import has_sound
+from .classifier import categorize_complaint
+
+# Chatbot form filling: one ChatSession per user; the front end renders its questions and history
+@dataclasses.dataclass
+class ChatSession:
+    language: str = "English"
+    questions_index: int = 0
+    form_data: dict = dataclasses.field(default_factory=dict)
+    form_data_translated: dict = dataclasses.field(default_factory=dict)
+    chat_history: list = dataclasses.field(default_factory=list)
+    active: bool = True
+
+    @property
+    def current_question(self):
+        if self.active and self.questions_index < len(form_filling_questions):
+            return form_filling_questions[self.questions_index]
+        return None
+
+    @property
+    def progress(self):
+        return self.questions_index / len(form_filling_questions)
+
+    def record_exchange(self, question_text, answer):
+        self.chat_history.append({"message": question_text, "is_user": False})
+        self.chat_history.append({"message": answer, "is_user": True})
+
+    def set_field(self, field, value, english_value):
+        self.form_data[field] = value
+        self.form_data_translated[field] = english_value
+
+    def finish(self, on_chunk=None):
+        self.active = False
+        category, explanation = categorize_complaint(self.form_data_translated, on_chunk=on_chunk)
+        self.set_field('category', category, category)
+        self.set_field('category_explanation', explanation, explanation)
+        return category, explanation
+
+    def reset(self):
+        self.questions_index = 0
+        self.form_data = {}
+        self.form_data_translated = {}
+        self.chat_history = []
+        self.active = True
+
+# Transcribe a WAV answer; returns an iterator of streamed text chunks, or None when the recording is silent
+def transcribe_audio(audio_bytes):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
+        temp_file.write(audio_bytes)
+        temp_path = temp_file.name
+    if not has_sound(temp_path):
+        os.unlink(temp_path)
+        return None
+
+    def chunks():
+        try:
+            yield from stream_gemini_response("Transcribe this audio:", temp_path, "audio/wav")
+        finally:
+            os.unlink(temp_path)
+    return chunks()
+
+# Process one chatbot answer against the session's current question; returns the bot's reply, if any.
+# `evidence_files` are stored uploads for the evidence question; `on_chunk` receives the streamed categorization.
+def process_chatbot_input(session, user_input, evidence_files=None, on_chunk=None):
+    current_question = session.current_question
+    if current_question is None:
+        return None
+    lang = session.language
+    commands = native_commands.get(lang, native_commands["English"])
+    question_text = get_question_text(current_question['question'], "English")
+
+    if user_input.lower() in [commands["next"], "next"]:
+        session.questions_index += 1
+        return None
+    elif user_input.lower() in [commands["back"], "back"]:
+        session.questions_index = max(0, session.questions_index - 1)
+        return None
+    elif user_input.lower() in [commands["submit"], "submit"]:
+        category, explanation = session.finish(on_chunk)
+        return f"All details collected. Complaint categorized as: {category}. Explanation: {explanation}"
+    elif user_input.lower() in [commands["repeat"], "repeat"]:
+        return get_question_text(current_question['question'], lang)
+
+    field = current_question['field']
+    extracted_value = extract_info_locally(current_question, user_input, lang)
+    if extracted_value is None:
+        extracted_value, english_value = extract_and_translate(question_text, current_question, user_input, lang)
+    elif needs_translation(current_question, extracted_value):
+        english_value = translate_text(extracted_value, lang, "English", config.PRIORITY_INTERACTIVE)
+    else:
+        english_value = extracted_value
+    if current_question.get('type') == "yes_no":
+        if extracted_value not in ["yes", "no"]:
+            return translate_text("Please respond with 'yes' or 'no'.", "English", lang, config.PRIORITY_INTERACTIVE)
+        session.set_field(field, extracted_value, extracted_value)
+    else:
+        session.set_field(field, extracted_value, english_value)
+        if current_question.get('type') == "text_and_upload" and evidence_files:
+            session.form_data['evidence_files'] = evidence_files
+    session.questions_index += 1
+
+    if session.questions_index >= len(form_filling_questions):
+        category, explanation = session.finish(on_chunk)
+        return f"Thank you for providing all the information. Complaint categorized as: {category}. Explanation: {explanation}"
+    return None
@@ -0,0 +1,239 @@
+"""Complaint categorization: local TF-IDF/rules fast path, Gemini prompt and packed batch mode."""
+import collections
+import functools
+import json
+import math
+import time
+
+from . import config
+from .gemini import get_gemini_response, stream_gemini_response
+from .language import parse_json_response, split_words
+from .evidence import analyze_evidence_images
+
+# Weighted rules for the local classifier: a "yes" flag points strongly at one category,
+# keyword prefixes in the description add smaller amounts of evidence
+CATEGORY_FLAGS = {
+    "threat_harass_women_children": "Cyber Harassment",
+    "financial_scam": "Financial Fraud",
+    "malware_ransomware": "System Security",
+    "illegal_trafficking": "Illegal Activities",
+}
+CATEGORY_KEYWORDS = {
+    "Cyber Harassment": ["harass", "threat", "stalk", "abus", "blackmail", "morph", "obscen", "bully", "sextort", "defam", "impersonat", "troll"],
+    "Financial Fraud": ["upi", "otp", "bank", "loan", "card", "phish", "refund", "invest", "kyc", "wallet", "paytm", "lottery", "debit", "credit", "scam"],
+    "System Security": ["malware", "ransom", "virus", "hack", "trojan", "encrypt", "breach", "spyware", "keylog", "unauthori", "ddos", "compromis"],
+    "Illegal Activities": ["drug", "weapon", "traffick", "narcotic", "counterfeit", "darkweb", "smuggl", "gambl", "contraband", "fake currency"],
+}
+FLAG_WEIGHT = 3.0
+KEYWORD_WEIGHT = 0.5
+MAX_KEYWORD_HITS = 4
+MODEL_WEIGHT = 3.0
+
+def tokenize(text):
+    return split_words(str(text).lower())
+
+# Free text the local classifier looks at
+def complaint_model_text(data):
+    return " ".join(str(data.get(field, '')) for field in ("incident_description", "evidence"))
+
+# L2-normalized sublinear TF-IDF vector over the model vocabulary
+def tfidf_vector(tokens, idf):
+    counts = collections.Counter(t for t in tokens if t in idf)
+    vector = {t: (1 + math.log(c)) * idf[t] for t, c in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {t: v / norm for t, v in vector.items()} if norm else {}
+
+# Train the TF-IDF nearest-centroid model offline from (complaint data, category) pairs of historical tickets
+def train_category_model(records, max_terms=300, min_df=2):
+    docs = [(tokenize(complaint_model_text(data)), category) for data, category in records if category in config.VALID_CATEGORIES]
+    document_frequency = collections.Counter()
+    for tokens, _ in docs:
+        document_frequency.update(set(tokens))
+    idf = {t: math.log((1 + len(docs)) / (1 + df)) + 1 for t, df in document_frequency.items() if df >= min_df}
+    centroids = {}
+    for category in config.VALID_CATEGORIES:
+        total = collections.Counter()
+        for tokens, label in docs:
+            if label == category:
+                total.update(tfidf_vector(tokens, idf))
+        top = dict(total.most_common(max_terms))
+        norm = math.sqrt(sum(v * v for v in top.values()))
+        if norm:
+            centroids[category] = {t: v / norm for t, v in top.items()}
+    vocabulary = {t for centroid in centroids.values() for t in centroid}
+    return {
+        "version": 1,
+        "trained_at": time.time(),
+        "documents": len(docs),
+        "idf": {t: idf[t] for t in vocabulary},
+        "centroids": centroids,
+    }
+
+@functools.cache
+def get_category_model():
+    try:
+        with open(config.CATEGORY_MODEL_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# CPU-only categorization from the yes/no flags, keywords and the offline model; returns (category, confidence, explanation)
+def classify_locally(data, model=None):
+    scores = {category: 0.0 for category in config.VALID_CATEGORIES}
+    reasons = []
+    for field, category in CATEGORY_FLAGS.items():
+        if str(data.get(field, '')).strip().lower() == "yes":
+            scores[category] += FLAG_WEIGHT
+            reasons.append(f"the complainant answered yes to the {field.replace('_', ' ')} question")
+
+    text = complaint_model_text(data).lower()
+    tokens = tokenize(text)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        matched = [k for k in keywords if (" " in k and k in text) or any(t.startswith(k) for t in tokens)]
+        if matched:
+            scores[category] += KEYWORD_WEIGHT * min(len(matched), MAX_KEYWORD_HITS)
+            reasons.append(f"the description mentions terms associated with {category} ({', '.join(matched[:MAX_KEYWORD_HITS])})")
+
+    if model:
+        vector = tfidf_vector(tokens, model['idf'])
+        for category, centroid in model['centroids'].items():
+            scores[category] += MODEL_WEIGHT * sum(v * centroid.get(t, 0.0) for t, v in vector.items())
+
+    total = sum(math.exp(score) for score in scores.values())
+    category = max(scores, key=scores.get)
+    confidence = math.exp(scores[category]) / total
+    explanation = (
+        f"This complaint was categorized as {category} with {confidence:.0%} confidence by the local classifier. "
+        + (f"Signals considered: {'; '.join(reasons)}." if reasons else "No strong category signals were found.")
+    )
+    return category, confidence, explanation
+
+# Shared instruction block of the single and packed categorization prompts
+CATEGORIZATION_INSTRUCTIONS = """You are an expert cybercrime analyst with advanced knowledge in digital forensics, behavioral analysis, and legal frameworks. Your task is to categorize complaints into one of these categories:
+    - Cyber Harassment
+    - Financial Fraud
+    - System Security
+    - Illegal Activities
+    - Other
+
+    Provide a precise and detailed explanation (6-10 sentences) justifying the chosen category, adhering to these enhanced steps:
+    1. Analyze each Yes/No response, assigning weighted relevance to potential categories based on severity and specificity.
+    2. Perform a semantic analysis of the incident description, identifying key phrases, intent, and contextual clues with high accuracy.
+    3. Integrate image analysis (if available) as corroborative evidence, assessing its relevance to the complaint narrative.
+    4. Cross-reference the combined data against known cybercrime patterns and typologies for consistency.
+    5. Resolve ambiguities by prioritizing the most specific and impactful evidence, avoiding generic assumptions.
+    6. Conclude with a clear, evidence-based rationale for the selected category, ensuring alignment with legal definitions."""
+
+# Complaint fields and image analyses as they appear in a categorization prompt
+def complaint_details(data):
+    complaint_text = "\n".join([f"{k}: {v}" for k, v in data.items() if k not in ['evidence_files', 'category', 'category_explanation']])
+    image_analyses = analyze_evidence_images(data.get('evidence_files', []))
+    return f"""Complaint details:
+    {complaint_text}
+
+    Image Analysis (if any):
+    {"; ".join(image_analyses) if image_analyses else "No images provided."}"""
+
+# Enhanced Categorization with Advanced Prompting; confident local classifications skip Gemini entirely
+def categorize_complaint(data, use_local=True, on_chunk=None):
+    local_category, confidence, local_explanation = classify_locally(data, get_category_model())
+    if use_local and confidence >= config.LOCAL_CLASSIFIER_THRESHOLD:
+        return local_category, local_explanation
+
+    prompt = f"""
+    {CATEGORIZATION_INSTRUCTIONS}
+
+    Respond in this format:
+    Category: [category name]
+    Explanation: [detailed explanation]
+
+    {complaint_details(data)}
+    """
+    if on_chunk is None:
+        response = get_gemini_response(prompt, priority=config.PRIORITY_SUBMIT)
+    else:
+        # Stream the explanation to the caller (e.g. a chat placeholder) while it is generated
+        response = ""
+        for chunk in stream_gemini_response(prompt, priority=config.PRIORITY_SUBMIT):
+            response += chunk
+            on_chunk(response)
+        response = response.strip()
+    if not response:
+        # Gemini is unavailable or degraded: use the local classifier's best guess
+        return local_category, local_explanation
+    try:
+        category_line, explanation_line = response.split('\n', 1)
+        category = category_line.split(": ")[1]
+        explanation = explanation_line.split(": ")[1]
+        return category if category in config.VALID_CATEGORIES else "Other", explanation
+    except Exception:
+        return local_category, local_explanation
+
+# Packed categorization: K complaints per Gemini call share one instruction block (batch/backlog work only)
+def packed_categorization_prompt(complaints):
+    items = "\n\n    ".join(f"### Complaint {i}\n    {complaint_details(data)}" for i, data in enumerate(complaints))
+    return f"""
+    {CATEGORIZATION_INSTRUCTIONS}
+
+    Categorize each of the {len(complaints)} complaints below independently.
+    Respond with only a JSON array containing one object per complaint, in this format:
+    [{{"id": <complaint number>, "category": "<category name>", "explanation": "<detailed explanation>"}}]
+
+    {items}
+    """
+
+# Map a packed reply to {index: (category, explanation)}, keeping only well-formed items for known indexes
+def validate_packed_results(parsed, count):
+    results = {}
+    if not isinstance(parsed, list):
+        return results
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        index, category, explanation = item.get('id'), item.get('category'), item.get('explanation')
+        if isinstance(index, str) and index.strip().isdigit():
+            index = int(index)
+        if (isinstance(index, int) and 0 <= index < count and index not in results
+                and category in config.VALID_CATEGORIES and isinstance(explanation, str) and explanation.strip()):
+            results[index] = (category, explanation.strip())
+    return results
+
+def categorize_complaints_packed(complaints, use_local=True, pack_size=None, priority=None):
+    pack_size = pack_size or config.CATEGORIZE_PACK_SIZE
+    priority = config.PRIORITY_PREFETCH if priority is None else priority
+    results = [None] * len(complaints)
+    fallbacks = {}
+    pending = []
+    for i, data in enumerate(complaints):
+        local_category, confidence, local_explanation = classify_locally(data, get_category_model())
+        fallbacks[i] = (local_category, local_explanation)
+        if use_local and confidence >= config.LOCAL_CLASSIFIER_THRESHOLD:
+            results[i] = fallbacks[i]
+        else:
+            pending.append(i)
+
+    def run_pack(indexes):
+        response = get_gemini_response(
+            packed_categorization_prompt([complaints[i] for i in indexes]), json_output=True, priority=priority
+        )
+        if response is None:
+            # Gemini is unavailable: re-splitting would only add failing calls, so use the local guesses
+            for i in indexes:
+                results[i] = fallbacks[i]
+            return
+        answered = validate_packed_results(parse_json_response(response), len(indexes))
+        for position, result in answered.items():
+            results[indexes[position]] = result
+        failed = [i for position, i in enumerate(indexes) if position not in answered]
+        if len(failed) == len(indexes) == 1:
+            results[failed[0]] = fallbacks[failed[0]]
+        elif failed:
+            # Re-split items the model dropped or mangled into smaller packs
+            half = (len(failed) + 1) // 2
+            run_pack(failed[:half])
+            if failed[half:]:
+                run_pack(failed[half:])
+
+    for start in range(0, len(pending), pack_size):
+        run_pack(pending[start:start + pack_size])
+    return results
@@ -0,0 +1,128 @@
+"""Configuration for the CyberGuard engine: service credentials, limits, paths and tuning knobs.
+
+Modules read settings as ``config.NAME`` at call time, so tools and tests can override them before first use.
+"""
+
+# Supabase Configuration
+supabase_url = # supabase_url#
+supabase_key =  # supabase_key#
+
+# SMTP Configuration
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = # smtp_port#
+SMTP_EMAIL =# smtp_email#
+SMTP_PASSWORD = # smtp_password#
+SMTP_USE_TLS = True  # set False (and leave SMTP_PASSWORD empty) to deliver through a local debugging SMTP server
+SMTP_POOL_SIZE = 2
+
+# Gemini AI Configuration
+GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+GEMINI_API_KEY = # api_key#
+
+# Gemini resilience configuration: per-attempt timeout, overall deadline, backoff and circuit breaker
+GEMINI_TIMEOUT_SECONDS = 30
+GEMINI_DEADLINE_SECONDS = 90
+GEMINI_MAX_RETRIES = 3
+GEMINI_BACKOFF_BASE_SECONDS = 1.0
+GEMINI_BACKOFF_MAX_SECONDS = 20.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60
+
+# Process-wide Gemini scheduling: concurrency cap, request/token rate limits (match your project's quota)
+GEMINI_MAX_IN_FLIGHT = 8
+GEMINI_REQUESTS_PER_MINUTE = 300
+GEMINI_TOKENS_PER_MINUTE = 1000000
+GEMINI_QUEUE_TIMEOUT_SECONDS = 60
+GEMINI_OUTPUT_TOKEN_ALLOWANCE = 512
+GEMINI_ATTACHMENT_TOKENS = 258
+
+# Priority classes, most urgent first
+PRIORITY_SUBMIT = 0        # categorization, evidence analysis and translation while a complaint is submitted
+PRIORITY_INTERACTIVE = 1   # chatbot turns and audio transcription
+PRIORITY_PREFETCH = 2      # background tips catalog refresh
+PRIORITY_TRANSLATION = 3   # question translations
+PRIORITY_NAMES = {PRIORITY_SUBMIT: "submit", PRIORITY_INTERACTIVE: "interactive", PRIORITY_PREFETCH: "prefetch", PRIORITY_TRANSLATION: "translation"}
+
+# Prompt cache configuration (point PROMPT_CACHE_PATH at a shared volume to share it across hosts)
+PROMPT_CACHE_PATH = "cyberguard_prompt_cache.db"
+PROMPT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+PROMPT_CACHE_MAX_ENTRIES = 50000
+PROMPT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Post-submit outbox configuration (email and tips are delivered by background workers)
+OUTBOX_DB_PATH = "cyberguard_outbox.db"
+OUTBOX_WORKERS = 2
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_LEASE_SECONDS = 300
+OUTBOX_POLL_SECONDS = 2
+OUTBOX_BATCH_SIZE = 20
+
+# Evidence image analysis configuration
+IMAGE_ANALYSIS_WORKERS = 4
+IMAGE_MIME_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+IMAGE_MAX_DIMENSION = 1600  # long edge in pixels; keeps screenshot text legible
+IMAGE_JPEG_QUALITY = 85
+
+# Evidence blob store configuration: "local" keeps blobs under BLOB_STORE_PATH, "supabase" uses a Storage bucket
+BLOB_STORE_BACKEND = "local"
+BLOB_STORE_PATH = "evidence_blobs"
+BLOB_STORE_BUCKET = "evidence"
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+# Local categorization fast path: Gemini is only consulted below LOCAL_CLASSIFIER_THRESHOLD confidence
+CATEGORY_MODEL_PATH = "category_model.json"
+LOCAL_CLASSIFIER_THRESHOLD = 0.8
+# Complaints per Gemini call in packed (batch) categorization
+CATEGORIZE_PACK_SIZE = 8
+
+# Translations memoized per process (each entry is also backed by the prompt cache)
+TRANSLATION_CACHE_SIZE = 4096
+
+# Storage backend: "supabase", "sqlite" (local database at STORAGE_SQLITE_PATH, for offline use and tests) or
+# "write_behind" (complaints acknowledged from a local SQLite buffer and bulk-inserted into Supabase in the background)
+STORAGE_BACKEND = "supabase"
+STORAGE_SQLITE_PATH = "cyberguard_store.db"
+WRITE_BEHIND_BUFFER_PATH = "cyberguard_write_behind.db"
+WRITE_BEHIND_BATCH_SIZE = 200
+WRITE_BEHIND_FLUSH_SECONDS = 2
+
+# Admin read replica: a local SQLite copy of the complaints table, synced incrementally by last_updated.
+# Each sync re-reads REPLICA_SYNC_OVERLAP_SECONDS before the high-water mark to pick up rows committed late.
+REPLICA_DB_PATH = "cyberguard_replica.db"
+REPLICA_SYNC_SECONDS = 30
+REPLICA_PAGE_SIZE = 1000
+REPLICA_SYNC_OVERLAP_SECONDS = 300
+
+# Admin work queue: open tickets are ranked by category points + points for each yes/no flag answered "yes" +
+# WORK_QUEUE_AGE_POINTS_PER_DAY for every day since filing. Status changes are sent STATUS_UPDATE_BATCH_SIZE at a time.
+WORK_QUEUE_CATEGORY_POINTS = {"Cyber Harassment": 30, "Financial Fraud": 25, "Illegal Activities": 25, "System Security": 20, "Other": 0}
+WORK_QUEUE_FLAG_POINTS = {"threat_harass_women_children": 50, "illegal_trafficking": 40, "financial_scam": 15, "malware_ransomware": 15}
+WORK_QUEUE_AGE_POINTS_PER_DAY = 5
+WORK_QUEUE_REFRESH_SECONDS = 30
+STATUS_UPDATE_BATCH_SIZE = 200
+
+# Admin API endpoints (/admin/...) are disabled unless this bearer token is set
+ADMIN_API_TOKEN = ""
+# Complaint API endpoints take the HTTP Basic credentials of an app account, like the Streamlit app's sign-in.
+# Legacy CYBER-XXXXXXXX ticket IDs have only 32 bits and no check character, so lookups by them are rate-limited per account.
+LEGACY_TICKET_LOOKUPS_PER_MINUTE = 10
+
+# Track page ticket lookups: summaries are cached per ticket for TICKET_CACHE_TTL_SECONDS. Status changes made by this
+# process evict the entry at once; changes made by other processes (other app workers, the admin API, batch tools) show
+# up when the entry expires, so keep the TTL short
+TICKET_CACHE_TTL_SECONDS = 15
+TICKET_CACHE_MAX_ENTRIES = 10000
+
+# Rendered complaint PDFs: PDF_CACHE_MEMORY_ENTRIES kept in memory, older ones spilled under PDF_CACHE_PATH
+PDF_CACHE_PATH = "pdf_cache"
+PDF_CACHE_MEMORY_ENTRIES = 256
+PDF_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# Safety-tips catalog configuration (one entry per category and language, refreshed in the background)
+TIPS_CATALOG_PATH = "tips_catalog.json"
+TIPS_CATALOG_REFRESH_SECONDS = 7 * 24 * 60 * 60
+TIPS_CATALOG_LEASE_SECONDS = 60 * 60  # one process regenerates at a time; a crashed holder frees the lease after this
+DEFAULT_TIPS = "1. Be cautious online.\n2. Use strong passwords.\n3. Avoid suspicious links.\n4. Keep software updated.\n5. Report suspicious activity."
+
+VALID_CATEGORIES = ["Cyber Harassment", "Financial Fraud", "System Security", "Illegal Activities", "Other"]
@@ -0,0 +1,13 @@
+"""Exceptions raised by the CyberGuard engine."""
+
+# Exceptions raised by the core engine; front ends decide how to present them
+class CyberGuardError(Exception):
+    pass
+
+# Gemini could not be reached (circuit open, retries exhausted or deadline passed)
+class GeminiUnavailableError(CyberGuardError):
+    pass
+
+# A storage backend read or write failed
+class StorageError(CyberGuardError):
+    pass
@@ -0,0 +1,189 @@
+"""Evidence uploads: content-addressed blob storage, image preprocessing/analysis and audio checks."""
+import base64
+import functools
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it images are sent to Gemini as uploaded
+    Image = None
+
+from . import config
+from .services import get_supabase
+from .gemini import get_gemini_response
+
+logger = logging.getLogger(__name__)
+
+# Stream an upload to a temp file in chunks while hashing it; returns (sha256, size, temp_path)
+def spool_and_hash(stream, directory=None, chunk_size=None):
+    chunk_size = chunk_size or config.BLOB_CHUNK_SIZE
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                digest.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return digest.hexdigest(), size, temp_path
+
+# Content-addressed evidence store on the local filesystem; identical uploads are stored once
+class LocalBlobStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def put(self, stream):
+        sha256, size, temp_path = spool_and_hash(stream, self.root)
+        path = self._path(sha256)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return sha256, size
+
+    def exists(self, sha256):
+        return os.path.exists(self._path(sha256))
+
+    def get(self, sha256):
+        with open(self._path(sha256), "rb") as f:
+            return f.read()
+
+# Content-addressed evidence store in a Supabase Storage bucket
+class SupabaseBlobStore:
+    def __init__(self, client, bucket):
+        self.bucket = client.storage.from_(bucket)
+
+    @staticmethod
+    def _path(sha256):
+        return f"{sha256[:2]}/{sha256}"
+
+    def put(self, stream):
+        sha256, size, temp_path = spool_and_hash(stream)
+        try:
+            if not self.exists(sha256):
+                with open(temp_path, "rb") as f:
+                    self.bucket.upload(self._path(sha256), f.read())
+        finally:
+            os.unlink(temp_path)
+        return sha256, size
+
+    def exists(self, sha256):
+        return any(item.get('name') == sha256 for item in self.bucket.list(sha256[:2], {"search": sha256}))
+
+    def get(self, sha256):
+        return self.bucket.download(self._path(sha256))
+
+@functools.cache
+def get_blob_store():
+    if config.BLOB_STORE_BACKEND == "supabase":
+        return SupabaseBlobStore(get_supabase(), config.BLOB_STORE_BUCKET)
+    return LocalBlobStore(config.BLOB_STORE_PATH)
+
+# Store uploaded evidence in the blob store; complaint rows keep only these references
+def store_evidence_files(uploaded_files):
+    store = get_blob_store()
+    evidence_files = []
+    for f in uploaded_files:
+        sha256, size = store.put(f)
+        evidence_files.append({"name": f.name, "sha256": sha256, "size": size, "mime_type": f.type})
+    return evidence_files
+
+# Load evidence bytes by hash (rows filed before the blob store carry inline base64 content)
+def load_evidence_bytes(evidence):
+    if 'sha256' in evidence:
+        return get_blob_store().get(evidence['sha256'])
+    return base64.b64decode(evidence['content'])
+
+# Detect the real image format from its magic bytes
+def sniff_image_mime(image_data, default="image/jpeg"):
+    if image_data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if image_data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_data[:4] == b"RIFF" and image_data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+# Downscale, re-encode and drop EXIF/metadata before a vision call; returns (bytes, mime_type)
+def preprocess_image(image_data):
+    if Image is None:
+        return image_data, sniff_image_mime(image_data)
+    try:
+        image = Image.open(io.BytesIO(image_data))
+        image.draft("RGB", (config.IMAGE_MAX_DIMENSION, config.IMAGE_MAX_DIMENSION))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((config.IMAGE_MAX_DIMENSION, config.IMAGE_MAX_DIMENSION), Image.LANCZOS)
+        # Flat-colour screenshots usually compress better as PNG, photos as JPEG: keep the smaller
+        encoded = []
+        for image_format, mime, options in (("JPEG", "image/jpeg", {"quality": config.IMAGE_JPEG_QUALITY, "optimize": True}),
+                                            ("PNG", "image/png", {"optimize": True})):
+            output = io.BytesIO()
+            image.save(output, format=image_format, **options)
+            encoded.append((len(output.getvalue()), output.getvalue(), mime))
+        _, prepared, mime_type = min(encoded, key=lambda item: item[0])
+        return prepared, mime_type
+    except Exception:
+        return image_data, sniff_image_mime(image_data)
+
+# Vision call on preprocessed bytes; the prompt cache keys it on the SHA-256 of those bytes, so only an exact copy of
+# the same image (from any complaint) reuses an earlier analysis
+def analyze_prepared_image(prepared, mime_type):
+    prompt = "Analyze this image and describe its content relevant to a cybercrime complaint."
+    analysis = get_gemini_response(prompt, mime_type=mime_type, file_data=prepared, priority=config.PRIORITY_SUBMIT)
+    return analysis if analysis else "No significant content detected in the image."
+
+# Analyze Image with Gemini (image passed as in-memory bytes)
+def analyze_image(image_data, mime_type="image/jpeg"):
+    prepared, mime_type = preprocess_image(image_data)
+    return analyze_prepared_image(prepared, mime_type)
+
+# Analyze all evidence images of one complaint concurrently on a bounded thread pool; results keep the upload order.
+# Images whose preprocessed bytes are identical (the same file uploaded twice) are analyzed once; visually similar
+# screenshots are always analyzed separately, since they can differ in exactly the text that matters (amounts, UTRs).
+def analyze_evidence_images(evidence_files):
+    images = [e for e in evidence_files if os.path.splitext(e['name'])[1].lower() in config.IMAGE_MIME_TYPES]
+    if not images:
+        return []
+
+    def prepare(evidence):
+        return preprocess_image(load_evidence_bytes(evidence))
+
+    with ThreadPoolExecutor(max_workers=min(config.IMAGE_ANALYSIS_WORKERS, len(images))) as executor:
+        prepared_images = list(executor.map(prepare, images))
+        digests = [hashlib.sha256(prepared).hexdigest() for prepared, _ in prepared_images]
+        futures = {}
+        for digest, prepared_image in zip(digests, prepared_images):
+            if digest not in futures:
+                futures[digest] = executor.submit(analyze_prepared_image, *prepared_image)
+        analyses = [futures[digest].result() for digest in digests]
+    return [f"Image {e['name']}: {analysis}" for e, analysis in zip(images, analyses)]
+
+# Check if audio has sound
+def has_sound(audio_path):
+    try:
+        from pydub import AudioSegment
+        audio = AudioSegment.from_file(audio_path)
+        return audio.dBFS > -60  # Threshold for detecting sound
+    except Exception:
+        logger.exception("Audio analysis error")
+        return False
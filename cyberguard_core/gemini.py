@@ -0,0 +1,449 @@
+"""Gemini access: persistent prompt cache, retrying client with circuit breaker, scheduler and single-flight."""
+import collections
+import contextlib
+import functools
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from . import config
+from .errors import GeminiUnavailableError
+from .services import get_gemini_model, sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+# Disk-backed Gemini response cache shared by every worker process (SQLite in WAL mode)
+class PromptCache:
+    def __init__(self, path, ttl_seconds, max_entries, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        with sqlite_connection(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_cache_accessed_at ON prompt_cache (accessed_at)")
+
+    # Whitespace-normalized hash of prompt, model and attachment
+    @staticmethod
+    def make_key(prompt, model_name, attachment=None, mime_type=None, json_output=False):
+        digest = hashlib.sha256()
+        for part in (model_name, " ".join(prompt.split()), mime_type or "", "json" if json_output else "text"):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        if attachment is not None:
+            digest.update(hashlib.sha256(attachment).digest())
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with sqlite_connection(self.path) as conn:
+                row = conn.execute("SELECT value, created_at FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM prompt_cache WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE prompt_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                return row[0]
+        except sqlite3.Error:
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        try:
+            with sqlite_connection(self.path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prompt_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error:
+            pass
+
+    # Drop expired entries, then least recently used ones until both the entry and byte caps hold
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM prompt_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM prompt_cache ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM prompt_cache WHERE key = ?", stale)
+
+@functools.cache
+def get_prompt_cache():
+    return PromptCache(config.PROMPT_CACHE_PATH, config.PROMPT_CACHE_TTL_SECONDS, config.PROMPT_CACHE_MAX_ENTRIES, config.PROMPT_CACHE_MAX_BYTES)
+
+# Errors worth retrying: quota exhaustion and transient server or network failures. google.api_core (and grpc behind
+# it) is only imported once a Gemini call fails, so importing this package stays cheap.
+@functools.cache
+def transient_gemini_errors():
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:  # no Gemini SDK installed (e.g. a fake model in tests)
+        return (TimeoutError, ConnectionError)
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+        TimeoutError,
+        ConnectionError,
+    )
+
+# Consecutive-failure circuit breaker: open after `failure_threshold` failures, allow one trial call after `reset_seconds`.
+# A trial that is never settled (record_success/record_failure) is replaced by a new one after another `reset_seconds`.
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state in ("open", "half_open") and now - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trips += 1
+
+# Gemini client wrapper with per-call deadlines, jittered exponential backoff and a circuit breaker.
+# Any object with a generate_content method can stand in for the model (e.g. a fake that injects faults).
+class ResilientGeminiClient:
+    def __init__(self, model, timeout_seconds, deadline_seconds, max_retries, backoff_base, backoff_max, breaker):
+        self.model = model
+        self.timeout_seconds = timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=1000)
+        self._first_chunk_latencies = collections.deque(maxlen=1000)
+        self.counters = {"calls": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # Backoff before the next attempt, or None once retries, the deadline or the breaker say stop
+    def _retry_delay(self, attempt, deadline):
+        self.breaker.record_failure()
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline or not self.breaker.allow():
+            self._count("failures")
+            return None
+        self._count("retries")
+        return delay
+
+    def _begin(self):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise GeminiUnavailableError("Gemini circuit breaker is open; using local fallbacks")
+        self._count("calls")
+        return time.monotonic() + self.deadline_seconds
+
+    def _succeed(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+        self.breaker.record_success()
+        self._count("successes")
+
+    # Gemini answered, but with an error that retrying will not fix (e.g. a blocked response whose .text raises
+    # ValueError). The service itself is up, so this settles the breaker (ending a half-open trial) as a success.
+    def _reject(self):
+        self.breaker.record_success()
+        self._count("failures")
+
+    def generate(self, contents, generation_config=None):
+        deadline = self._begin()
+        attempt = 0
+        while True:
+            timeout = max(1.0, min(self.timeout_seconds, deadline - time.monotonic()))
+            start = time.monotonic()
+            try:
+                response = self.model.generate_content(contents, generation_config=generation_config, request_options={"timeout": timeout})
+                text = response.text.strip()
+            except transient_gemini_errors():
+                delay = self._retry_delay(attempt, deadline)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except Exception:
+                self._reject()
+                raise
+            self._succeed(time.monotonic() - start)
+            return text
+
+    # Streaming variant yielding text chunks; retries only happen before the first chunk has been yielded
+    def generate_stream(self, contents, generation_config=None):
+        deadline = self._begin()
+        attempt = 0
+        while True:
+            timeout = max(1.0, min(self.timeout_seconds, deadline - time.monotonic()))
+            start = time.monotonic()
+            started = False
+            try:
+                for chunk in self.model.generate_content(contents, generation_config=generation_config, stream=True,
+                                                         request_options={"timeout": timeout}):
+                    if chunk.text:
+                        if not started:
+                            started = True
+                            with self._lock:
+                                self._first_chunk_latencies.append(time.monotonic() - start)
+                        yield chunk.text
+            except transient_gemini_errors():
+                delay = None if started else self._retry_delay(attempt, deadline)
+                if delay is None:
+                    if started:
+                        self.breaker.record_failure()
+                        self._count("failures")
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except GeneratorExit:
+                # The caller stopped reading; Gemini was answering, so the call counts as a success
+                self._succeed(time.monotonic() - start)
+                raise
+            except Exception:
+                self._reject()
+                raise
+            self._succeed(time.monotonic() - start)
+            return
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.counters)
+            latencies = sorted(self._latencies)
+            first_chunk = sorted(self._first_chunk_latencies)
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            stats[f"latency_{name}_seconds"] = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+        stats["first_chunk_p50_seconds"] = first_chunk[len(first_chunk) // 2] if first_chunk else None
+        stats["circuit_state"] = self.breaker.state
+        stats["circuit_trips"] = self.breaker.trips
+        return stats
+
+# Shared scheduler in front of Gemini: at most `max_in_flight` calls, request and token buckets refilled
+# per minute, and waiting callers served strictly by priority class, then arrival order
+class GeminiScheduler:
+    def __init__(self, max_in_flight, requests_per_minute, tokens_per_minute):
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.in_flight = 0
+        self.request_budget = float(requests_per_minute)
+        self.token_budget = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._wait_times = {priority: collections.deque(maxlen=1000) for priority in config.PRIORITY_NAMES}
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self.request_budget = min(self.requests_per_minute, self.request_budget + elapsed * self.requests_per_minute / 60)
+        self.token_budget = min(self.tokens_per_minute, self.token_budget + elapsed * self.tokens_per_minute / 60)
+
+    @contextlib.contextmanager
+    def slot(self, priority, tokens, timeout):
+        tokens = min(tokens, self.tokens_per_minute)
+        entry = (priority, next(self._sequence))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    is_head = self._waiters[0] == entry and self.in_flight < self.max_in_flight
+                    if is_head and self.request_budget >= 1 and self.token_budget >= tokens:
+                        break
+                    wait = start + timeout - time.monotonic()
+                    if wait <= 0:
+                        raise GeminiUnavailableError("Timed out waiting for a Gemini slot")
+                    if is_head:
+                        # Only the rate limits hold the head back: sleep until the buckets have refilled enough
+                        refill_wait = max((1 - self.request_budget) * 60 / self.requests_per_minute,
+                                          (tokens - self.token_budget) * 60 / self.tokens_per_minute)
+                        wait = min(wait, max(refill_wait, 0.01))
+                    self._cond.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+            self.in_flight += 1
+            self.request_budget -= 1
+            self.token_budget -= tokens
+            self._wait_times.setdefault(priority, collections.deque(maxlen=1000)).append(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            stats = {"queue_depth": len(self._waiters), "in_flight": self.in_flight,
+                     "request_budget": round(self.request_budget, 1), "token_budget": round(self.token_budget)}
+            for priority, waits in self._wait_times.items():
+                ordered = sorted(waits)
+                name = config.PRIORITY_NAMES.get(priority, str(priority))
+                stats[f"queue_wait_{name}_p50_seconds"] = ordered[len(ordered) // 2] if ordered else None
+                stats[f"queue_wait_{name}_p95_seconds"] = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None
+        return stats
+
+# Rough token estimate used for the tokens-per-minute bucket
+def estimate_tokens(prompt, attachment=None):
+    return len(prompt) // 4 + (config.GEMINI_ATTACHMENT_TOKENS if attachment is not None else 0) + config.GEMINI_OUTPUT_TOKEN_ALLOWANCE
+
+# Single-flight coalescing: concurrent identical requests (same prompt-cache key) wait on one in-flight call
+class SingleFlight:
+    def __init__(self, wait_timeout):
+        self.wait_timeout = wait_timeout
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result(timeout=self.wait_timeout)
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+@functools.cache
+def get_single_flight():
+    return SingleFlight(config.GEMINI_QUEUE_TIMEOUT_SECONDS + config.GEMINI_DEADLINE_SECONDS)
+
+@functools.cache
+def get_gemini_scheduler():
+    return GeminiScheduler(config.GEMINI_MAX_IN_FLIGHT, config.GEMINI_REQUESTS_PER_MINUTE, config.GEMINI_TOKENS_PER_MINUTE)
+
+@functools.cache
+def get_gemini_client():
+    return ResilientGeminiClient(
+        get_gemini_model(), config.GEMINI_TIMEOUT_SECONDS, config.GEMINI_DEADLINE_SECONDS, config.GEMINI_MAX_RETRIES,
+        config.GEMINI_BACKOFF_BASE_SECONDS, config.GEMINI_BACKOFF_MAX_SECONDS,
+        CircuitBreaker(config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_RESET_SECONDS)
+    )
+
+# Gemini response function with improved error handling and a persistent response cache
+def get_gemini_response(prompt, file_path=None, mime_type=None, json_output=False, use_cache=True, file_data=None,
+                        priority=None):
+    priority = config.PRIORITY_INTERACTIVE if priority is None else priority
+    generation_config = {"response_mime_type": "application/json"} if json_output else None
+    try:
+        file_content = file_data if file_data is not None and mime_type else None
+        if file_content is None and file_path and mime_type:
+            with open(file_path, "rb") as file:
+                file_content = file.read()
+        cache = get_prompt_cache()
+        cache_key = cache.make_key(prompt, config.GEMINI_MODEL_NAME, file_content, mime_type, json_output)
+        cached = cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            return cached
+        contents = [prompt, {"mime_type": mime_type, "data": file_content}] if file_content is not None else prompt
+
+        def call_gemini():
+            # A call that finished between our cache miss and becoming leader has already filled the cache
+            cached = cache.get(cache_key) if use_cache else None
+            if cached is not None:
+                return cached
+            with get_gemini_scheduler().slot(priority, estimate_tokens(prompt, file_content), config.GEMINI_QUEUE_TIMEOUT_SECONDS):
+                text = get_gemini_client().generate(contents, generation_config)
+            cache.put(cache_key, text)
+            return text
+
+        return get_single_flight().do(cache_key, call_gemini)
+    except GeminiUnavailableError:
+        return None  # callers fall back to their local defaults while the breaker is open
+    except Exception:
+        logger.exception("Gemini API error")
+        return None
+
+# Streaming Gemini response: yields text chunks as they arrive (a cached answer is yielded whole).
+# Yields nothing when Gemini is unavailable so callers can fall back.
+def stream_gemini_response(prompt, file_path=None, mime_type=None, priority=None):
+    priority = config.PRIORITY_INTERACTIVE if priority is None else priority
+    try:
+        file_content = None
+        if file_path and mime_type:
+            with open(file_path, "rb") as file:
+                file_content = file.read()
+        cache = get_prompt_cache()
+        cache_key = cache.make_key(prompt, config.GEMINI_MODEL_NAME, file_content, mime_type)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        contents = [prompt, {"mime_type": mime_type, "data": file_content}] if file_content is not None else prompt
+        chunks = []
+        with get_gemini_scheduler().slot(priority, estimate_tokens(prompt, file_content), config.GEMINI_QUEUE_TIMEOUT_SECONDS):
+            for chunk in get_gemini_client().generate_stream(contents):
+                chunks.append(chunk)
+                yield chunk
+        text = "".join(chunks).strip()
+        if text:
+            cache.put(cache_key, text)
+    except GeminiUnavailableError:
+        return
+    except Exception:
+        logger.exception("Gemini API error")
@@ -0,0 +1,319 @@
+"""Question tables, translation and extraction of chatbot answers (local parsers first, Gemini as fallback)."""
+import datetime
+import functools
+import json
+import re
+import unicodedata
+
+from . import config
+from .errors import GeminiUnavailableError
+from .gemini import get_gemini_response
+
+# Language mappings
+languages = {
+    "Hindi": "hi-IN", "Konkani": "kok-IN", "Kannada": "kn-IN", "Dogri": "doi-IN",
+    "Bodo": "brx-IN", "Urdu": "ur-IN", "Tamil": "ta-IN", "Kashmiri": "ks-IN",
+    "Assamese": "as-IN", "Bengali": "bn-IN", "Marathi": "mr-IN", "Sindhi": "sd-IN",
+    "Maithili": "mai-IN", "Punjabi": "pa-IN", "Malayalam": "ml-IN", "Manipuri": "mni-IN",
+    "Telugu": "te-IN", "Sanskrit": "sa-IN", "Nepali": "ne-IN", "Santali": "sat-IN",
+    "Gujarati": "gu-IN", "Odia": "or-IN", "English": "en-IN"
+}
+tts_lang_codes = {k: v.split('-')[0] + '-' + v.split('-')[1].upper() for k, v in languages.items()}
+native_commands = {
+    "English": {"next": "next", "back": "back", "submit": "submit", "repeat": "repeat"},
+    "Hindi": {"next": "अगला", "back": "पीछे", "submit": "जमा करें", "repeat": "दोहराएं"},
+    "Tamil": {"next": "அடுத்து", "back": "பின்னால்", "submit": "சமர்ப்பி", "repeat": "மீண்டும்"},
+    "Telugu": {"next": "తదుపరి", "back": "వెనక్కి", "submit": "సమర్పించు", "repeat": "పునరావృతం"},
+    "Kannada": {"next": "ಮುಂದಿನ", "back": "ಹಿಂದೆ", "submit": "ಸಲ್ಲಿಸು", "repeat": "ಪುನರಾವರ್ತನೆ"},
+    "Malayalam": {"next": "അടുത്തത്", "back": "പിന്നോട്ട്", "submit": "സമർപ്പിക്കുക", "repeat": "ആവർത്തിക്കുക"},
+    "Marathi": {"next": "पुढील", "back": "मागे", "submit": "सादर करा", "repeat": "पुनरावृत्ती"},
+    "Bengali": {"next": "পরবর্তী", "back": "পিছনে", "submit": "জমা দিন", "repeat": "পুনরাবৃত্তি"},
+    "Gujarati": {"next": "આગળ", "back": "પાછળ", "submit": "સબમિટ કરો", "repeat": "પુનરાવર્તન"},
+    "Punjabi": {"next": "ਅਗਲਾ", "back": "ਪਿੱਛੇ", "submit": "ਜਮ੍ਹਾ ਕਰੋ", "repeat": "ਦੁਹਰਾਓ"},
+    "Dogri": {"next": "अगला", "back": "पिछे", "submit": "जमा करो", "repeat": "दुहराओ"},
+}
+
+native_yes_no = {
+    "English": {"yes": ["yes", "y", "yeah", "yep", "yup", "sure", "correct", "true"], "no": ["no", "n", "nope", "nah", "never", "false", "not"]},
+    "Hindi": {"yes": ["हाँ", "हां", "हा", "जी", "जी हाँ", "जी हां", "haan", "han"], "no": ["नहीं", "नही", "ना", "जी नहीं", "nahi", "nahin"]},
+    "Tamil": {"yes": ["ஆம்", "ஆமாம்", "aam"], "no": ["இல்லை", "illai"]},
+    "Telugu": {"yes": ["అవును", "avunu"], "no": ["కాదు", "లేదు", "kaadu", "ledu"]},
+    "Kannada": {"yes": ["ಹೌದು", "haudu"], "no": ["ಇಲ್ಲ", "illa"]},
+    "Malayalam": {"yes": ["അതെ", "ഉവ്വ്", "athe"], "no": ["ഇല്ല", "alla", "illa"]},
+    "Marathi": {"yes": ["हो", "होय", "ho"], "no": ["नाही", "nahi"]},
+    "Bengali": {"yes": ["হ্যাঁ", "হাঁ", "হ্যা"], "no": ["না"]},
+    "Gujarati": {"yes": ["હા", "ha"], "no": ["ના", "na"]},
+    "Punjabi": {"yes": ["ਹਾਂ", "ਹਾਂਜੀ"], "no": ["ਨਹੀਂ", "ਨਹੀ"]},
+    "Urdu": {"yes": ["ہاں", "جی"], "no": ["نہیں", "نہ"]},
+    "Odia": {"yes": ["ହଁ", "ହଁ"], "no": ["ନା", "ନାହିଁ"]},
+    "Assamese": {"yes": ["হয়", "হয়"], "no": ["নহয়", "নহয়", "না"]},
+    "Nepali": {"yes": ["हो", "हजुर"], "no": ["होइन", "छैन"]},
+    "Konkani": {"yes": ["हय", "हो"], "no": ["ना", "नाका"]},
+    "Dogri": {"yes": ["हां", "हाँ"], "no": ["नेईं", "नहीं"]},
+}
+# Words stripped around a name in the "name and phone" answer
+native_name_fillers = {
+    "English": ["my", "name", "is", "i", "am", "im", "and", "phone", "number", "mobile", "contact", "no", "its", "it", "this", "the", "me"],
+    "Hindi": ["मेरा", "नाम", "है", "और", "फोन", "फ़ोन", "नंबर", "मोबाइल", "मैं", "हूँ", "हूं"],
+}
+
+# Updated Complaint Questionnaire
+form_filling_questions = [
+    {"field": "name_phone", "question": {"English": "What is your full name and contact phone number?"}, "required": True},
+    {"field": "email", "question": {"English": "What is your email address?"}, "required": True},
+    {"field": "incident_date", "question": {"English": "When did the incident occur? (Please provide the date and approximate time.)"}, "required": True},
+    {"field": "threat_harass_women_children", "question": {"English": "Have you or someone you know received threatening or harassing messages online specifically targeting women or children? Please answer with yes or no."}, "required": False, "type": "yes_no"},
+    {"field": "financial_scam", "question": {"English": "Have you experienced unauthorized financial transactions, phishing scams, or deceptive financial offers via online communications? Please answer with yes or no."}, "required": False, "type": "yes_no"},
+    {"field": "malware_ransomware", "question": {"English": "Has your computer system or network been compromised by malware, ransomware, or unauthorized access? Please answer with yes or no."}, "required": False, "type": "yes_no"},
+    {"field": "illegal_trafficking", "question": {"English": "Have you encountered online platforms or content facilitating illegal trafficking or sale of goods/services? Please answer with yes or no."}, "required": False, "type": "yes_no"},
+    {"field": "incident_description", "question": {"English": "Can you describe what happened in detail?"}, "required": True},
+    {"field": "evidence", "question": {"English": "Do you have any evidence such as screenshots, emails, or messages that support your report? Please describe and upload if available."}, "required": False, "type": "text_and_upload"},
+]
+
+# Translation function with caching (a failed call raises so that lru_cache does not memoize the fallback)
+@functools.lru_cache(maxsize=config.TRANSLATION_CACHE_SIZE)
+def _translate_text_cached(text, source_lang, target_lang, priority):
+    prompt = f"""
+    You are a precise language translator. Translate the following '{source_lang}' text into '{target_lang}' and return ONLY the translated text, nothing else—no explanations, no breakdowns, no notes. Use the appropriate script for the target language.
+    Text to translate: {text}
+    """
+    response = get_gemini_response(prompt, priority=priority)
+    if not response:
+        raise GeminiUnavailableError("Translation unavailable")
+    return response
+
+# Translate text, falling back to the untranslated text when Gemini is unavailable
+def translate_text(text, source_lang, target_lang, priority=None):
+    if source_lang == target_lang or not text:
+        return text
+    priority = config.PRIORITY_TRANSLATION if priority is None else priority
+    try:
+        return _translate_text_cached(text, source_lang, target_lang, priority)
+    except GeminiUnavailableError:
+        return text
+
+# Parse a JSON reply from Gemini, tolerating markdown code fences around it
+def parse_json_response(response):
+    if not response:
+        return None
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.lower().startswith("json"):
+            text = text[4:]
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+# Fields that are never sent for translation: the English category label and raw evidence uploads
+UNTRANSLATED_FIELDS = {'category', 'evidence_files'}
+
+# Batch translation: translate every text field of a complaint in a single Gemini call
+def translate_batch(data, source_lang, target_lang):
+    translated = dict(data)
+    if source_lang == target_lang:
+        return translated
+    yes_no_fields = {q['field'] for q in form_filling_questions if q.get('type') == "yes_no"}
+    texts = {
+        k: v for k, v in data.items()
+        if isinstance(v, str) and v.strip() and k not in UNTRANSLATED_FIELDS and k not in yes_no_fields
+    }
+    if not texts:
+        return translated
+
+    prompt = f"""
+    You are a precise language translator. Translate every value of the following JSON object from '{source_lang}' into '{target_lang}'. Return ONLY a JSON object with exactly the same keys, where each value is the translated text—no explanations, no breakdowns, no notes. Use the appropriate script for the target language.
+    JSON to translate: {json.dumps(texts, ensure_ascii=False)}
+    """
+    result = parse_json_response(get_gemini_response(prompt, json_output=True, priority=config.PRIORITY_SUBMIT))
+    if not isinstance(result, dict):
+        result = {}
+    for k, v in texts.items():
+        value = result.get(k)
+        # Fall back to a single-field translation only for keys the batch reply dropped or mangled
+        translated[k] = value.strip() if isinstance(value, str) and value.strip() else translate_text(v, source_lang, target_lang, config.PRIORITY_SUBMIT)
+    return translated
+
+# Split text into words by Unicode category; unlike \w this keeps the combining vowel signs of Indic scripts
+def split_words(text):
+    return "".join(c if unicodedata.category(c)[0] in "LMN" else " " for c in text).split()
+
+# Convert digits in any script (e.g. Devanagari, Tamil) to ASCII digits
+def normalize_digits(text):
+    return "".join(str(unicodedata.decimal(c)) if not c.isascii() and unicodedata.decimal(c, None) is not None else c for c in text)
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s-]{7,15}\d")
+NUMERIC_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b"), ("year", "month", "day")),
+    (re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{2,4})\b"), ("day", "month", "year")),
+]
+MONTHS = {m: i + 1 for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+NAMED_DATE_PATTERNS = [
+    (re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?([a-z]{3})[a-z]*\.?,?\s+(\d{4})\b"), ("day", "month", "year")),
+    (re.compile(r"\b([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b"), ("month", "day", "year")),
+]
+TIME_PATTERN = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?(?![\d/-])")
+
+def extract_email(response):
+    match = EMAIL_PATTERN.search(response)
+    return match.group(0) if match else None
+
+def extract_name_phone(response, lang):
+    text = normalize_digits(response)
+    match = PHONE_PATTERN.search(text)
+    if not match:
+        return None
+    phone = re.sub(r"[\s-]", "", match.group(0))
+    if not 10 <= len(phone.lstrip("+")) <= 13:
+        return None
+    fillers = set(native_name_fillers["English"]) | set(native_name_fillers.get(lang, []))
+    rest = (text[:match.start()] + " " + text[match.end():]).lower()
+    name = [w for w in split_words(rest) if w not in fillers]
+    if not 1 <= len(name) <= 4 or any(ch.isdigit() for w in name for ch in w):
+        return None
+    # Keep the original casing of the name words
+    original = {w.lower(): w for w in split_words(text)}
+    return f"{' '.join(original.get(w, w) for w in name)} {phone}"
+
+def extract_incident_date(response):
+    text = normalize_digits(response).lower()
+    found = None
+    for pattern, order in NUMERIC_DATE_PATTERNS + NAMED_DATE_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        parts = dict(zip(order, match.groups()))
+        if not parts['month'].isdigit():
+            if parts['month'] not in MONTHS:
+                continue
+            parts['month'] = MONTHS[parts['month']]
+        year = int(parts['year'])
+        try:
+            found = (datetime.date(year + 2000 if year < 100 else year, int(parts['month']), int(parts['day'])), match.span())
+            break
+        except ValueError:
+            continue
+    if found is None:
+        today = datetime.date.today()
+        if "yesterday" in text:
+            found = (today - datetime.timedelta(days=1), (0, 0))
+        elif "today" in text:
+            found = (today, (0, 0))
+        else:
+            return None
+    date, (start, end) = found
+    rest = text[:start] + " " + text[end:]
+    for match in TIME_PATTERN.finditer(rest):
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if match.group(2) is None and meridiem is None:
+            continue  # a bare number is not a time
+        if meridiem:
+            if not 1 <= hour <= 12:
+                continue
+            hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+        if hour < 24 and minute < 60:
+            return f"{date:%d-%m-%Y} {hour:02d}:{minute:02d}"
+    return f"{date:%d-%m-%Y}"
+
+# Only a bare answer ("Yes.", "जी हाँ") is decided locally; anything longer ("no, but my daughter was threatened")
+# can qualify or reverse the first word, so it goes to the LLM
+def extract_yes_no(response, lang):
+    phrase = " ".join(split_words(response.lower()))
+    if not phrase:
+        return None
+    for language in {lang, "English"}:
+        lexicon = native_yes_no.get(language)
+        if not lexicon:
+            continue
+        for answer in ("yes", "no"):
+            if phrase in lexicon[answer]:
+                return answer
+    return None
+
+# Deterministic extraction per questionnaire field; returns None when the LLM should handle the answer
+def extract_info_locally(question, response, lang):
+    response = response.strip()
+    if not response:
+        return None
+    field, question_type = question['field'], question.get('type')
+    if question_type == "yes_no":
+        return extract_yes_no(response, lang)
+    if field == "email":
+        return extract_email(response)
+    if field == "name_phone":
+        return extract_name_phone(response, lang)
+    if field == "incident_date":
+        return extract_incident_date(response)
+    if field in ("incident_description", "evidence"):
+        return response  # free text is stored as provided
+    return None
+
+# Structured values that came out of local parsing in Latin script are language-neutral and need no translation
+LANGUAGE_NEUTRAL_FIELDS = {"email", "incident_date", "name_phone"}
+
+def needs_translation(question, value):
+    if not value or question.get('type') == "yes_no":
+        return False
+    return not (question['field'] in LANGUAGE_NEUTRAL_FIELDS and value.isascii())
+
+# Extract information and its English form in one structured Gemini call
+def extract_and_translate(question_text, question, response, lang):
+    prompt = f"""
+    You are an advanced information extraction and translation system. Given the following question and a user response written in {lang}, extract ONLY the relevant information and translate it into English. Do not use brackets, '[Not Provided]', or any extra text. If the response is incomplete or unclear, return only what can be confidently extracted; otherwise, use empty strings.
+    Return ONLY a JSON object of the form {{"value": "<extracted value exactly as the user gave it>", "english": "<the extracted value in English>"}}.
+
+    Question: {question_text}
+    Response: {response}
+
+    Extract:
+    - For "What is your full name and contact phone number?": the full name and phone number as a single string (e.g., "pruthviraj 544434")
+    - For "What is your email address?": the email address (e.g., "aakash@gmail.com")
+    - For "When did the incident occur?": the date and time (e.g., "12-03-2025 14:30")
+    - For "Can you describe what happened in detail?": the full description as provided
+    - For "Do you have any evidence...?": the evidence description as provided
+    - For yes/no questions: "yes" or "no" (lowercase) in both fields; if unclear, empty strings
+    """
+    result = parse_json_response(get_gemini_response(prompt, json_output=True))
+    if not isinstance(result, dict):
+        return "", ""
+    value = validate_extracted(question, result.get("value"))
+    english = validate_extracted(question, result.get("english")) if lang != "English" else value
+    if value is None or english is None:
+        return "", ""
+    return value, english or value
+
+# Per-field validation of structured extraction output; anything else is rejected instead of stored
+YES_NO_SCHEMA = {"choices": ["yes", "no"]}
+EXTRACTION_SCHEMAS = {
+    "name_phone": {"max_length": 200},
+    "email": {"max_length": 254, "pattern": EMAIL_PATTERN},
+    "incident_date": {"max_length": 100},
+    "incident_description": {"max_length": 10000},
+    "evidence": {"max_length": 5000},
+}
+
+# Returns the cleaned value, "" when nothing was extracted, or None when the value breaks the field schema
+def validate_extracted(question, value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value:
+        return ""
+    schema = YES_NO_SCHEMA if question.get('type') == "yes_no" else EXTRACTION_SCHEMAS.get(question['field'], {})
+    if "choices" in schema:
+        value = value.lower()
+        return value if value in schema["choices"] else None
+    if len(value) > schema.get("max_length", 1000):
+        return None
+    if "pattern" in schema and not schema["pattern"].fullmatch(value):
+        return None
+    return value
+
+# Get question text (translations are cached by translate_text and the prompt cache; a failed
+# translation falls back to English for this call only instead of being stored in the question table)
+def get_question_text(question_dict, lang):
+    if lang in question_dict:
+        return question_dict[lang]
+    return translate_text(question_dict.get("English", ""), "English", lang)
@@ -0,0 +1,452 @@
+"""Confirmation emails: safety-tips catalog, pooled SMTP delivery and the durable outbox."""
+import collections
+import datetime
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from . import config
+from .services import sqlite_connection
+from .gemini import get_gemini_response
+from .language import languages
+
+logger = logging.getLogger(__name__)
+
+# Prompt for 5 tips in the given language based on the category
+def cybercrime_tips_prompt(category, language="English"):
+    return f"""
+    You are a cybersecurity expert tasked with providing practical and meaningful advice. Based on the cybercrime category '{category}', generate exactly 5 concise, actionable tips to help individuals avoid falling victim to this type of crime. Ensure the tips are specific to the category, easy to understand, and useful for the general public. Write the tips in {language}, using the appropriate script. Format the response as a numbered list (1-5) with no additional explanations or introductions beyond the tips themselves.
+
+    Category: {category}
+    """
+
+# Precomputed category x language tips catalog, stored as a versioned JSON artifact so emails need no LLM call.
+# Regeneration is guarded by a lease row in a SQLite file next to the catalog, so one worker process refreshes for all.
+class TipsCatalog:
+    def __init__(self, path, refresh_seconds, lease_seconds):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.lease_seconds = lease_seconds
+        self.lease_path = f"{path}.lease.db"
+        self.holder = f"{os.getpid()}-{os.urandom(4).hex()}"
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.artifact = {"version": 0, "generated_at": 0, "model": config.GEMINI_MODEL_NAME, "tips": {}}
+        with sqlite_connection(self.lease_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refresh_lease ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), holder TEXT NOT NULL, lease_until REAL NOT NULL)"
+            )
+        self._reload()
+        threading.Thread(target=self._refresh_loop, name="tips-catalog-refresh", daemon=True).start()
+
+    # Pick up a catalog written by this or another worker process
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                artifact = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self.artifact = artifact
+            self._mtime = mtime
+
+    def lookup(self, category, language="English"):
+        self._reload()
+        tips = self.artifact.get("tips", {}).get(category, {})
+        return tips.get(language) or tips.get("English") or config.DEFAULT_TIPS
+
+    # Regenerate every entry, keeping the previous text wherever Gemini fails, and publish a new version atomically.
+    # Nothing is published when every call failed (Gemini down, breaker open): a catalog with a fresh generated_at
+    # would hold off the next attempt for refresh_seconds. Returns the number of entries regenerated.
+    def refresh(self):
+        previous = self.artifact.get("tips", {})
+        tips = {}
+        regenerated = 0
+        for category in config.VALID_CATEGORIES:
+            tips[category] = {}
+            for language in languages:
+                text = get_gemini_response(cybercrime_tips_prompt(category, language), use_cache=False, priority=config.PRIORITY_PREFETCH)
+                regenerated += bool(text)
+                text = text or previous.get(category, {}).get(language)
+                if text:
+                    tips[category][language] = text
+        if not regenerated:
+            return 0
+        artifact = {
+            "version": self.artifact.get("version", 0) + 1,
+            "generated_at": time.time(),
+            "model": config.GEMINI_MODEL_NAME,
+            "tips": tips,
+        }
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+        self._reload()
+        return regenerated
+
+    def age(self):
+        return time.time() - self.artifact.get("generated_at", 0)
+
+    # Take the refresh lease unless another process holds an unexpired one; a crashed holder's lease simply expires
+    def _acquire_lease(self):
+        now = time.time()
+        with sqlite_connection(self.lease_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT holder, lease_until FROM refresh_lease WHERE id = 1").fetchone()
+            if row and row[0] != self.holder and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO refresh_lease (id, holder, lease_until) VALUES (1, ?, ?)",
+                         (self.holder, now + self.lease_seconds))
+            return True
+
+    def _release_lease(self):
+        with sqlite_connection(self.lease_path) as conn:
+            conn.execute("DELETE FROM refresh_lease WHERE id = 1 AND holder = ?", (self.holder,))
+
+    # Refresh once per catalog generation across all processes: the age is checked again after taking the lease,
+    # because another process may have published a new catalog in the meantime. Returns True if this call published one.
+    def refresh_if_stale(self):
+        self._reload()
+        if self.age() < self.refresh_seconds or not self._acquire_lease():
+            return False
+        try:
+            self._reload()
+            if self.age() < self.refresh_seconds:
+                return False
+            return self.refresh() > 0
+        finally:
+            self._release_lease()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh_if_stale()
+            except Exception:
+                pass  # keep serving the last good catalog
+            # A stale catalog (another process holds the lease, or Gemini failed every call) is retried in about a minute
+            time.sleep(max(60, self.refresh_seconds - self.age()) + random.uniform(0, 60))
+
+@functools.cache
+def get_tips_catalog():
+    return TipsCatalog(config.TIPS_CATALOG_PATH, config.TIPS_CATALOG_REFRESH_SECONDS, config.TIPS_CATALOG_LEASE_SECONDS)
+
+# Function to build the confirmation email with tips (delivered by the outbox over pooled SMTP sessions)
+def build_confirmation_email(to_email, ticket_id, category, date_filed=None, language="English"):
+    tips = get_tips_catalog().lookup(category, language)
+    msg = MIMEMultipart()
+    msg['From'] = config.SMTP_EMAIL
+    msg['To'] = to_email
+    msg['Subject'] = f"CyberGuard AI - Complaint Confirmation (Ticket ID: {ticket_id})"
+
+    body = f"""
+        Dear User,
+
+        Thank you for submitting your complaint to CyberGuard AI - National Cyber Crime Reporting Portal.
+        Your complaint has been successfully registered with the following details:
+
+        Ticket ID: {ticket_id}
+        Date Filed: {date_filed or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        Status: Under Investigation
+        Category: {category}
+
+        You can track the status of your complaint using the Ticket ID on our portal under 'Track Complaint'.
+        For any further assistance, please contact us at cybercrime@nic.in or call 1930.
+
+        **5 Tips to Avoid {category} Crimes:**
+        {tips}
+
+        Regards,
+        CyberGuard AI Team
+        National Cyber Crime Reporting Portal
+        """
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+# Small pool of authenticated SMTP sessions reused across outbox batches
+class SMTPPool:
+    def __init__(self, host, port, username, password, use_tls, size):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._sent_at = collections.deque(maxlen=10000)
+        self.stats = {"connections_opened": 0, "reconnects": 0, "messages_sent": 0, "messages_failed": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+            if name == "messages_sent":
+                self._sent_at.append(time.time())
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.password:
+            server.login(self.username, self.password)
+        self._count("connections_opened")
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    # Take an idle session (checked with NOOP) or open a new one, never exceeding the pool size
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    server = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                try:
+                    if server.noop()[0] == 250:
+                        return server
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._close(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, server):
+        if server is not None:
+            self._idle.put(server)
+        self._slots.release()
+
+    # Send messages over one session; returns an error string (or None) per message.
+    # A dropped connection is reopened and the message retried once; recipient errors only fail that message.
+    def send_batch(self, messages):
+        errors = []
+        server = self._acquire()
+        try:
+            for msg in messages:
+                for attempt in range(2):
+                    try:
+                        if server is None:
+                            server = self._connect()
+                            self._count("reconnects")
+                        server.send_message(msg)
+                        self._count("messages_sent")
+                        errors.append(None)
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                        self._count("messages_failed")
+                        errors.append(str(e))
+                        break
+                    except (smtplib.SMTPException, OSError) as e:
+                        if server is not None:
+                            self._close(server)
+                            server = None
+                        if attempt == 1:
+                            self._count("messages_failed")
+                            errors.append(str(e))
+        finally:
+            self._release(server)
+        return errors
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            stats = dict(self.stats)
+            stats["messages_per_minute"] = sum(1 for sent_at in self._sent_at if now - sent_at <= 60)
+        stats["idle_sessions"] = self._idle.qsize()
+        return stats
+
+# Outbox handler: render and deliver a batch of confirmation emails over a pooled session
+def deliver_confirmation_emails(payloads):
+    messages = [
+        build_confirmation_email(p['to_email'], p['ticket_id'], p['category'], p.get('date_filed'), p.get('language', "English"))
+        for p in payloads
+    ]
+    return get_smtp_pool().send_batch(messages)
+
+# Durable local outbox for post-submit work; jobs survive restarts and are retried with backoff
+class Outbox:
+    def __init__(self, path, max_attempts, retry_base_seconds, lease_seconds):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        with sqlite_connection(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox_jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, ticket_id TEXT NOT NULL, kind TEXT NOT NULL, "
+                "payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "last_error TEXT, next_attempt_at REAL NOT NULL, lease_until REAL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_jobs_due ON outbox_jobs (status, next_attempt_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_jobs_ticket ON outbox_jobs (ticket_id)")
+
+    def enqueue(self, ticket_id, kind, payload):
+        now = time.time()
+        with sqlite_connection(self.path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox_jobs (ticket_id, kind, payload, status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?)",
+                (ticket_id, kind, json.dumps(payload), now, now, now)
+            )
+            return cursor.lastrowid
+
+    # Atomically lease up to `limit` due jobs of one kind; 'running' jobs whose lease expired (crashed worker) are reclaimed
+    def claim_batch(self, limit):
+        now = time.time()
+        due = "((status = 'pending' AND next_attempt_at <= ?) OR (status = 'running' AND lease_until < ?))"
+        with sqlite_connection(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            first = conn.execute(f"SELECT kind FROM outbox_jobs WHERE {due} ORDER BY next_attempt_at LIMIT 1", (now, now)).fetchone()
+            if first is None:
+                return []
+            rows = conn.execute(
+                f"SELECT id, ticket_id, kind, payload, attempts FROM outbox_jobs WHERE kind = ? AND {due} "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (first[0], now, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox_jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? WHERE id = ?",
+                [(now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+        return [{"id": r[0], "ticket_id": r[1], "kind": r[2], "payload": json.loads(r[3]), "attempts": r[4] + 1} for r in rows]
+
+    def complete_many(self, job_ids):
+        now = time.time()
+        with sqlite_connection(self.path) as conn:
+            conn.executemany(
+                "UPDATE outbox_jobs SET status = 'done', last_error = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+                [(now, job_id) for job_id in job_ids]
+            )
+
+    def fail(self, job, error):
+        now = time.time()
+        if job['attempts'] >= self.max_attempts:
+            status, next_attempt_at = 'failed', now
+        else:
+            delay = self.retry_base_seconds * 2 ** (job['attempts'] - 1)
+            status, next_attempt_at = 'pending', now + random.uniform(delay / 2, delay)
+        with sqlite_connection(self.path) as conn:
+            conn.execute(
+                "UPDATE outbox_jobs SET status = ?, last_error = ?, next_attempt_at = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, error, next_attempt_at, now, job['id'])
+            )
+
+    def status(self, ticket_id):
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                "SELECT kind, status, attempts, last_error, updated_at FROM outbox_jobs WHERE ticket_id = ? ORDER BY id",
+                (ticket_id,)
+            ).fetchall()
+        return [{"kind": r[0], "status": r[1], "attempts": r[2], "last_error": r[3], "updated_at": r[4]} for r in rows]
+
+    def counts(self):
+        with sqlite_connection(self.path) as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM outbox_jobs GROUP BY status").fetchall())
+
+# Background worker threads draining the outbox in batches; handlers take a list of payloads
+# and return one error string (or None on success) per payload
+class OutboxWorkerPool:
+    def __init__(self, outbox, handlers, num_workers, poll_seconds, batch_size):
+        self.outbox = outbox
+        self.handlers = handlers
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self.threads = [threading.Thread(target=self._run, name=f"outbox-worker-{i}", daemon=True) for i in range(num_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    # A database error anywhere in an iteration (e.g. "database is locked" under WAL contention) must not end the
+    # worker: get_outbox_workers never restarts it. Jobs claimed but not settled are reclaimed once their lease expires.
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self._process_batch():
+                    self._stop.wait(self.poll_seconds)
+            except Exception:
+                logger.exception("Outbox worker iteration failed; retrying in %ss", self.poll_seconds)
+                self._stop.wait(self.poll_seconds)
+
+    # Claim and deliver one batch; returns False when there was nothing to do
+    def _process_batch(self):
+        jobs = self.outbox.claim_batch(self.batch_size)
+        if not jobs:
+            return False
+        try:
+            handler = self.handlers.get(jobs[0]['kind'])
+            if handler is None:
+                raise ValueError(f"No handler registered for outbox job kind '{jobs[0]['kind']}'")
+            errors = handler([job['payload'] for job in jobs])
+        except Exception as e:
+            errors = [str(e)] * len(jobs)
+        self.outbox.complete_many([job['id'] for job, error in zip(jobs, errors) if error is None])
+        for job, error in zip(jobs, errors):
+            if error is not None:
+                self.outbox.fail(job, error)
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+OUTBOX_HANDLERS = {
+    "confirmation_email": deliver_confirmation_emails,
+}
+
+@functools.cache
+def get_smtp_pool():
+    return SMTPPool(config.SMTP_SERVER, config.SMTP_PORT, config.SMTP_EMAIL, config.SMTP_PASSWORD, config.SMTP_USE_TLS, config.SMTP_POOL_SIZE)
+
+@functools.cache
+def get_outbox():
+    return Outbox(config.OUTBOX_DB_PATH, config.OUTBOX_MAX_ATTEMPTS, config.OUTBOX_RETRY_BASE_SECONDS, config.OUTBOX_LEASE_SECONDS)
+
+@functools.cache
+def get_outbox_workers():
+    return OutboxWorkerPool(get_outbox(), OUTBOX_HANDLERS, config.OUTBOX_WORKERS, config.OUTBOX_POLL_SECONDS, config.OUTBOX_BATCH_SIZE)
+
+# Delivery metrics for monitoring: outbox queue depth plus SMTP pool throughput and reconnects
+def get_outbox_metrics():
+    counts = get_outbox().counts()
+    metrics = get_smtp_pool().snapshot()
+    metrics["queue_depth"] = counts.get('pending', 0) + counts.get('running', 0)
+    metrics["jobs_by_status"] = counts
+    return metrics
+
+# Human-readable delivery state of the confirmation email for the tracking page
+def describe_email_status(ticket_id):
+    try:
+        jobs = [job for job in get_outbox().status(ticket_id) if job['kind'] == "confirmation_email"]
+    except sqlite3.Error:
+        jobs = []
+    if not jobs:
+        return "N/A"
+    job = jobs[-1]
+    if job['status'] == 'done':
+        return "Sent"
+    if job['status'] == 'failed':
+        return f"Failed after {job['attempts']} attempts"
+    if job['status'] == 'running':
+        return "Sending"
+    return "Queued" if job['attempts'] == 0 else f"Retry scheduled after {job['attempts']} failed attempt(s)"
@@ -0,0 +1,192 @@
+"""Complaint PDF rendering with shared ReportLab templates and a render cache."""
+import collections
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+
+from . import config
+
+# ReportLab styles and the table layout are built once per process and shared by every render
+@functools.cache
+def get_pdf_templates():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle('Title', parent=styles['Heading1'], alignment=1, spaceAfter=12),
+        "footer": ParagraphStyle('Footer', parent=styles['Normal'], fontSize=10, textColor=colors.grey, alignment=1),
+        "table": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]),
+    }
+
+def complaint_pdf_rows(data):
+    return [
+        ["Ticket Number", data.get('ticket_id', '')],
+        ["Date Filed", data.get('date_filed', '')],
+        ["Name and Phone", data.get('name_phone', '')],
+        ["Email Address", data.get('email', '')],
+        ["Incident Date", data.get('incident_date', '')],
+        ["Threat/Harassment to Women/Children", data.get('threat_harass_women_children', 'N/A')],
+        ["Financial Scam", data.get('financial_scam', 'N/A')],
+        ["Malware/Ransomware", data.get('malware_ransomware', 'N/A')],
+        ["Illegal Trafficking", data.get('illegal_trafficking', 'N/A')],
+        ["Incident Description", data.get('incident_description', '')],
+        ["Evidence Description", data.get('evidence', '')],
+        ["Category", data.get('category', 'N/A')],
+        ["Category Explanation", data.get('category_explanation', 'N/A')],
+        ["Status", data.get('status', '')],
+    ]
+
+def render_complaint_pdf(rows):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+    templates = get_pdf_templates()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    table = Table(rows, colWidths=[150, 400])
+    table.setStyle(templates["table"])
+    story = [
+        Paragraph("CYBER CRIME COMPLAINT REPORT", templates["title"]),
+        Spacer(1, 12),
+        table,
+        Spacer(1, 12),
+        Paragraph("This is an auto-generated document from CyberGuard AI Portal", templates["footer"]),
+    ]
+    doc.build(story)
+    return buffer.getvalue()
+
+# Rendered PDFs keyed by ticket ID + hash of the rendered fields: an in-memory LRU that spills evicted
+# entries to disk. A new hash for a ticket (status or data changed) drops that ticket's older renders.
+class PdfCache:
+    def __init__(self, directory, memory_entries, disk_max_bytes):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._current = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def content_hash(rows):
+        return hashlib.sha256(json.dumps(rows, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _prefix(ticket_id):
+        return re.sub(r'[^A-Za-z0-9-]', '_', ticket_id) + "-"
+
+    def _path(self, ticket_id, digest):
+        return os.path.join(self.directory, f"{self._prefix(ticket_id)}{digest}.pdf")
+
+    def get(self, ticket_id, digest):
+        key = (ticket_id, digest)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        try:
+            with open(self._path(ticket_id, digest), "rb") as f:
+                pdf = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        self._remember(key, pdf)
+        return pdf
+
+    def put(self, ticket_id, digest, pdf):
+        with self._lock:
+            previous = self._current.get(ticket_id)
+            self._current[ticket_id] = digest
+        if previous is not None and previous != digest:
+            self.invalidate(ticket_id, keep=digest)
+        self._remember((ticket_id, digest), pdf)
+
+    def invalidate(self, ticket_id, keep=None):
+        with self._lock:
+            for key in [k for k in self._memory if k[0] == ticket_id and k[1] != keep]:
+                del self._memory[key]
+        prefix, kept = self._prefix(ticket_id), f"{self._prefix(ticket_id)}{keep}.pdf"
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name != kept:
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key, pdf):
+        with self._lock:
+            self._memory[key] = pdf
+            self._memory.move_to_end(key)
+            evicted = []
+            while len(self._memory) > self.memory_entries:
+                evicted.append(self._memory.popitem(last=False))
+        for (ticket_id, digest), data in evicted:
+            self._spill(ticket_id, digest, data)
+
+    def _spill(self, ticket_id, digest, pdf):
+        path = self._path(ticket_id, digest)
+        if os.path.exists(path):
+            return
+        temp_path = path + ".part"
+        with open(temp_path, "wb") as f:
+            f.write(pdf)
+        os.replace(temp_path, path)
+        # Keep the spill directory under its byte budget by dropping the oldest files
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".pdf")]
+        files.sort(key=lambda p: os.path.getmtime(p))
+        total = sum(os.path.getsize(p) for p in files)
+        for old in files:
+            if total <= self.disk_max_bytes:
+                break
+            total -= os.path.getsize(old)
+            with contextlib.suppress(OSError):
+                os.remove(old)
+
+    def snapshot(self):
+        with self._lock:
+            return {"memory_entries": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+@functools.cache
+def get_pdf_cache():
+    return PdfCache(config.PDF_CACHE_PATH, config.PDF_CACHE_MEMORY_ENTRIES, config.PDF_CACHE_DISK_MAX_BYTES)
+
+# PDF fields of a stored complaint row: the ticket number, status and filing date live in columns, not in translated_data
+def stored_complaint_pdf_data(record):
+    return dict(record['translated_data'], ticket_id=record['ticket_id'], status=record['status'],
+                date_filed=record['date_filed'])
+
+# Generate PDF (served from the render cache when the ticket's fields are unchanged)
+def generate_complaint_pdf(data):
+    rows = complaint_pdf_rows(data)
+    ticket_id = str(data.get('ticket_id') or "")
+    if not ticket_id:
+        return io.BytesIO(render_complaint_pdf(rows))
+    cache = get_pdf_cache()
+    digest = PdfCache.content_hash(rows)
+    pdf = cache.get(ticket_id, digest)
+    if pdf is None:
+        pdf = render_complaint_pdf(rows)
+        cache.put(ticket_id, digest, pdf)
+    return io.BytesIO(pdf)
@@ -0,0 +1,222 @@
+"""Local read replica of the complaints table, so admin filtering, paging and counting run without remote queries."""
+import datetime
+import functools
+import json
+import logging
+import threading
+import time
+
+from . import config
+from .services import add_missing_column, sqlite_connection
+from .storage import get_repository
+
+logger = logging.getLogger(__name__)
+
+FILTER_COLUMNS = ("status", "category")
+SORT_COLUMNS = ("date_filed", "last_updated")
+SUMMARY_COLUMNS = ("ticket_id", "status", "category", "date_filed", "last_updated", "assigned_to")
+
+# Supabase returns ISO timestamps ("2026-10-18T06:54:37.123+00:00"), the app writes "2026-10-18 06:54:37"
+def normalize_timestamp(value):
+    return str(value).replace("T", " ")[:19]
+
+# Complaints copied from the storage backend's change feed. The high-water mark is the newest last_updated seen; each
+# sync re-reads `overlap_seconds` before it, so rows committed late (clock skew between writers) are not missed.
+# Write-behind complaints are stamped when they are flushed, so buffering delay does not count against the overlap.
+class ComplaintReplica:
+    def __init__(self, path, page_size, overlap_seconds):
+        self.path = path
+        self.page_size = page_size
+        self.overlap_seconds = overlap_seconds
+        self.last_sync_rows = 0
+        self.last_sync_seconds = None
+        self.sync_failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        with sqlite_connection(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS complaints ("
+                "ticket_id TEXT PRIMARY KEY, status TEXT NOT NULL, category TEXT, date_filed TEXT NOT NULL, "
+                "last_updated TEXT NOT NULL, translated_data TEXT NOT NULL, assigned_to TEXT)"
+            )
+            add_missing_column(conn, "complaints", "assigned_to", "TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_replica_status ON complaints (status, date_filed, ticket_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_replica_category ON complaints (category, date_filed, ticket_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_replica_date_filed ON complaints (date_filed, ticket_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_replica_last_updated ON complaints (last_updated, ticket_id)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), high_water_mark TEXT, synced_at REAL)"
+            )
+            conn.execute("INSERT OR IGNORE INTO sync_state (id) VALUES (1)")
+
+    def _state(self):
+        with sqlite_connection(self.path) as conn:
+            return conn.execute("SELECT high_water_mark, synced_at FROM sync_state WHERE id = 1").fetchone()
+
+    # Pull changes newer than the high-water mark page by page; each page and its high-water mark commit together
+    def sync(self, source):
+        with self._sync_lock:
+            started = time.monotonic()
+            high_water_mark, _ = self._state()
+            cursor = None
+            if high_water_mark:
+                start = datetime.datetime.fromisoformat(normalize_timestamp(high_water_mark))
+                start -= datetime.timedelta(seconds=self.overlap_seconds)
+                cursor = (start.strftime("%Y-%m-%d %H:%M:%S"), "")
+            synced = 0
+            try:
+                while True:
+                    rows = source.changed_complaints(cursor, self.page_size)
+                    if not rows:
+                        break
+                    newest = rows[-1]['last_updated']
+                    if high_water_mark is None or normalize_timestamp(newest) > normalize_timestamp(high_water_mark):
+                        high_water_mark = newest
+                    with sqlite_connection(self.path) as conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO complaints "
+                            "(ticket_id, status, category, date_filed, last_updated, translated_data, assigned_to) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [self._row(row) for row in rows]
+                        )
+                        conn.execute("UPDATE sync_state SET high_water_mark = ? WHERE id = 1", (high_water_mark,))
+                    synced += len(rows)
+                    cursor = (newest, rows[-1]['ticket_id'])
+                    if len(rows) < self.page_size:
+                        break
+            except Exception as e:
+                with self._lock:
+                    self.sync_failures += 1
+                    self.last_error = str(e)
+                raise
+            with sqlite_connection(self.path) as conn:
+                conn.execute("UPDATE sync_state SET synced_at = ? WHERE id = 1", (time.time(),))
+            with self._lock:
+                self.last_sync_rows = synced
+                self.last_sync_seconds = time.monotonic() - started
+                self.last_error = None
+            return synced
+
+    @staticmethod
+    def _row(row):
+        translated_data = row['translated_data']
+        if isinstance(translated_data, str):
+            translated_data = json.loads(translated_data)
+        return (row['ticket_id'], row['status'], (translated_data or {}).get('category'),
+                normalize_timestamp(row['date_filed']), normalize_timestamp(row['last_updated']),
+                json.dumps(translated_data, ensure_ascii=False), row.get('assigned_to'))
+
+    # filed_from/filed_before bound date_filed ("YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS"; before is exclusive)
+    @staticmethod
+    def _where(status=None, category=None, assigned_to=None, filed_from=None, filed_before=None):
+        clauses, params = [], []
+        for column, value in (("status", status), ("category", category), ("assigned_to", assigned_to)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if filed_from:
+            clauses.append("date_filed >= ?")
+            params.append(filed_from)
+        if filed_before:
+            clauses.append("date_filed < ?")
+            params.append(filed_before)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit=50, offset=0, sort="date_filed", descending=True, **filters):
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_COLUMNS)}")
+        where, params = self._where(**filters)
+        direction = "DESC" if descending else "ASC"
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM complaints{where} "
+                f"ORDER BY {sort} {direction}, ticket_id {direction} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        with sqlite_connection(self.path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM complaints{where}", params).fetchone()[0]
+
+    def counts_by(self, column, **filters):
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"column must be one of {', '.join(FILTER_COLUMNS)}")
+        where, params = self._where(**filters)
+        with sqlite_connection(self.path) as conn:
+            return dict(conn.execute(f"SELECT {column}, COUNT(*) FROM complaints{where} GROUP BY {column}", params).fetchall())
+
+    def get(self, ticket_id):
+        with sqlite_connection(self.path) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, translated_data FROM complaints WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(SUMMARY_COLUMNS, row[:-1]), translated_data=json.loads(row[-1]))
+
+    # Open tickets with the fields the work queue ranks by
+    def complaints_with_status(self, status):
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, translated_data FROM complaints WHERE status = ?", (status,)
+            ).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row[:-1]), translated_data=json.loads(row[-1])) for row in rows]
+
+    # Write-through of changes made by this process, so they show before the next sync brings them back from the source
+    def apply_changes(self, ticket_ids, changes):
+        columns = [column for column in ("status", "last_updated", "assigned_to") if column in changes]
+        with sqlite_connection(self.path) as conn:
+            conn.executemany(
+                f"UPDATE complaints SET {', '.join(f'{column} = ?' for column in columns)} WHERE ticket_id = ?",
+                [[changes[column] for column in columns] + [ticket_id] for ticket_id in ticket_ids]
+            )
+
+    # Monitoring: row counts, the high-water mark and how stale the replica is (seconds since the last completed sync)
+    def snapshot(self):
+        high_water_mark, synced_at = self._state()
+        rows_by_status = self.counts_by("status")
+        with self._lock:
+            metrics = {
+                "rows": sum(rows_by_status.values()),
+                "rows_by_status": rows_by_status,
+                "high_water_mark": high_water_mark,
+                "seconds_since_sync": time.time() - synced_at if synced_at else None,
+                "last_sync_rows": self.last_sync_rows,
+                "last_sync_seconds": self.last_sync_seconds,
+                "sync_failures": self.sync_failures,
+                "last_error": self.last_error,
+            }
+        return metrics
+
+class ReplicaSyncer:
+    def __init__(self, replica, source, interval_seconds):
+        self.replica = replica
+        self.source = source
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="replica-syncer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.replica.sync(self.source)
+            except Exception as e:
+                logger.warning("Replica sync failed; retrying in %ss: %s", self.interval_seconds, e)
+            self._stop.wait(self.interval_seconds)
+
+    def stop(self):
+        self._stop.set()
+
+@functools.cache
+def get_replica():
+    return ComplaintReplica(config.REPLICA_DB_PATH, config.REPLICA_PAGE_SIZE, config.REPLICA_SYNC_OVERLAP_SECONDS)
+
+@functools.cache
+def get_replica_syncer():
+    return ReplicaSyncer(get_replica(), get_repository(), config.REPLICA_SYNC_SECONDS)
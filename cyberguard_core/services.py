@@ -0,0 +1,38 @@
+"""Lazily constructed service clients (Supabase, Gemini) and the shared SQLite connection helper."""
+import contextlib
+import functools
+import sqlite3
+
+from . import config
+
+# Service clients are constructed on first use, once per process
+@functools.cache
+def get_supabase():
+    from supabase import create_client
+    return create_client(config.supabase_url, config.supabase_key)
+
+@functools.cache
+def get_gemini_model():
+    import google.generativeai as genai
+    genai.configure(api_key=config.GEMINI_API_KEY)
+    return genai.GenerativeModel(config.GEMINI_MODEL_NAME)
+
+# SQLite connection helper shared by the local caches and the outbox
+@contextlib.contextmanager
+def sqlite_connection(path):
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+# Additive schema upgrade for SQLite databases created by an older version. Another thread or process opening the same
+# database may add the column between the check and the ALTER; losing that race is fine.
+def add_missing_column(conn, table, column, definition):
+    if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
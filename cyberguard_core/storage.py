@@ -0,0 +1,417 @@
+"""Storage backends for users and complaints: Supabase, local SQLite, and a SQLite write-behind buffer in front of Supabase.
+
+Every backend provides the same methods (user_exists, insert_user, check_credentials, insert_complaints,
+get_complaint, get_ticket_summary, update_complaint_status, transition_complaints, changed_complaints,
+complaints_after, update_complaint_categories, snapshot);
+get_repository() picks one from config.STORAGE_BACKEND.
+"""
+import datetime
+import functools
+import json
+import logging
+import threading
+import time
+
+from . import config
+from .services import add_missing_column, get_supabase, sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+# Columns the tracking view renders; the data/translated_data blobs stay in the database until a PDF is requested
+TICKET_SUMMARY_COLUMNS = (
+    "ticket_id,status,date_filed,last_updated,"
+    "category:translated_data->>category,category_explanation:translated_data->>category_explanation"
+)
+COMPLAINT_COLUMNS = ("ticket_id", "data", "translated_data", "status", "date_filed", "last_updated", "assigned_to")
+# Columns copied by the admin read replica (see replica.py)
+CHANGE_COLUMNS = ("ticket_id", "translated_data", "status", "date_filed", "last_updated", "assigned_to")
+# Columns transition_complaints may change
+TRANSITION_COLUMNS = ("status", "last_updated", "assigned_to")
+
+# Category write-back payload: the new category and explanation per ticket, read from the record's translated_data
+def category_updates(records):
+    return [{
+        "ticket_id": record['ticket_id'],
+        "category": record['translated_data']['category'],
+        "category_explanation": record['translated_data']['category_explanation'],
+        "last_updated": record['last_updated'],
+    } for record in records]
+
+class SupabaseRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def user_exists(self, username):
+        return bool(self.client.table('users').select('username').eq('username', username).execute().data)
+
+    def insert_user(self, username, password, email):
+        self.client.table('users').insert({
+            'username': username,
+            'password': password,  # In production, hash the password
+            'email': email
+        }).execute()
+
+    def check_credentials(self, username, password):
+        response = self.client.table('users').select('username').eq('username', username).eq('password', password).execute()
+        return bool(response.data)
+
+    # One request for the whole batch; upsert on ticket_id makes a retried batch idempotent
+    def insert_complaints(self, records):
+        self.client.table('complaints').upsert(records, on_conflict="ticket_id").execute()
+
+    def get_complaint(self, ticket_id):
+        response = self.client.table('complaints').select('*').eq('ticket_id', ticket_id).execute()
+        return response.data[0] if response.data else None
+
+    def get_ticket_summary(self, ticket_id):
+        response = self.client.table('complaints').select(TICKET_SUMMARY_COLUMNS).eq('ticket_id', ticket_id).execute()
+        return response.data[0] if response.data else None
+
+    def update_complaint_status(self, ticket_id, status, last_updated):
+        response = self.client.table('complaints').update({
+            "status": status,
+            "last_updated": last_updated,
+        }).eq('ticket_id', ticket_id).execute()
+        return bool(response.data)
+
+    # One UPDATE ... WHERE ticket_id IN (...) for the whole batch. With from_statuses it is a compare-and-set, so two
+    # investigators claiming the same ticket cannot both succeed. Returns the ticket IDs actually updated.
+    def transition_complaints(self, ticket_ids, changes, from_statuses=None):
+        query = self.client.table('complaints').update(changes).in_('ticket_id', list(ticket_ids))
+        if from_statuses:
+            query = query.in_('status', list(from_statuses))
+        return [row['ticket_id'] for row in query.execute().data]
+
+    # Change feed: complaints after the (last_updated, ticket_id) cursor, in that order; `after` is None for a full scan
+    def changed_complaints(self, after, limit):
+        query = self.client.table('complaints').select(",".join(CHANGE_COLUMNS))
+        if after:
+            last_updated, ticket_id = after
+            query = query.or_(f'last_updated.gt."{last_updated}",'
+                              f'and(last_updated.eq."{last_updated}",ticket_id.gt."{ticket_id}")')
+        return query.order('last_updated').order('ticket_id').limit(limit).execute().data
+
+    # Full complaint rows in ticket_id order, for batch tools paging through the table
+    def complaints_after(self, ticket_id, limit):
+        query = self.client.table('complaints').select(",".join(COMPLAINT_COLUMNS))
+        if ticket_id:
+            query = query.gt('ticket_id', ticket_id)
+        return query.order('ticket_id').limit(limit).execute().data
+
+    # One set_complaint_categories call (migrations/004) per batch: it sets only the category keys inside the JSON
+    # columns and last_updated, so status changes, claims and other edits made meanwhile are kept. Returns the
+    # ticket IDs updated.
+    def update_complaint_categories(self, records):
+        if not records:
+            return []
+        response = self.client.rpc('set_complaint_categories', {"updates": category_updates(records)}).execute()
+        return list(response.data or [])
+
+    def snapshot(self):
+        return {"backend": "supabase"}
+
+# Users and complaints in a local SQLite database (WAL), for offline use and tests; JSON columns are stored as text
+class SQLiteRepository:
+    def __init__(self, path):
+        self.path = path
+        with sqlite_connection(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "username TEXT PRIMARY KEY, password TEXT NOT NULL, email TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS complaints ("
+                "ticket_id TEXT PRIMARY KEY, data TEXT NOT NULL, translated_data TEXT NOT NULL, "
+                "status TEXT NOT NULL, date_filed TEXT NOT NULL, last_updated TEXT NOT NULL, "
+                "revision INTEGER NOT NULL DEFAULT 0, assigned_to TEXT)"
+            )
+            add_missing_column(conn, "complaints", "assigned_to", "TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_complaints_changes ON complaints (last_updated, ticket_id)")
+
+    def user_exists(self, username):
+        with sqlite_connection(self.path) as conn:
+            return conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone() is not None
+
+    def insert_user(self, username, password, email):
+        with sqlite_connection(self.path) as conn:
+            conn.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", (username, password, email))
+
+    def check_credentials(self, username, password):
+        with sqlite_connection(self.path) as conn:
+            row = conn.execute("SELECT 1 FROM users WHERE username = ? AND password = ?", (username, password)).fetchone()
+        return row is not None
+
+    def insert_complaints(self, records):
+        with sqlite_connection(self.path) as conn:
+            conn.executemany(
+                "INSERT INTO complaints (ticket_id, data, translated_data, status, date_filed, last_updated, assigned_to) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (ticket_id) DO UPDATE SET data = excluded.data, "
+                "translated_data = excluded.translated_data, status = excluded.status, date_filed = excluded.date_filed, "
+                "last_updated = excluded.last_updated, assigned_to = excluded.assigned_to, revision = revision + 1",
+                [self._row(record) for record in records]
+            )
+
+    @staticmethod
+    def _row(record):
+        return (record['ticket_id'], json.dumps(record['data'], ensure_ascii=False),
+                json.dumps(record['translated_data'], ensure_ascii=False),
+                record['status'], record['date_filed'], record['last_updated'], record.get('assigned_to'))
+
+    @staticmethod
+    def _record(row):
+        record = dict(zip(COMPLAINT_COLUMNS, row))
+        record['data'] = json.loads(record['data'])
+        record['translated_data'] = json.loads(record['translated_data'])
+        return record
+
+    def get_complaint(self, ticket_id):
+        with sqlite_connection(self.path) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(COMPLAINT_COLUMNS)} FROM complaints WHERE ticket_id = ?", (ticket_id,)
+            ).fetchone()
+        return self._record(row) if row else None
+
+    def get_ticket_summary(self, ticket_id):
+        with sqlite_connection(self.path) as conn:
+            row = conn.execute(
+                "SELECT ticket_id, status, date_filed, last_updated, json_extract(translated_data, '$.category'), "
+                "json_extract(translated_data, '$.category_explanation') FROM complaints WHERE ticket_id = ?",
+                (ticket_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("ticket_id", "status", "date_filed", "last_updated", "category", "category_explanation"), row))
+
+    # Returns False when the ticket is not stored here
+    def update_complaint_status(self, ticket_id, status, last_updated):
+        with sqlite_connection(self.path) as conn:
+            cursor = conn.execute(
+                "UPDATE complaints SET status = ?, last_updated = ?, revision = revision + 1 WHERE ticket_id = ?",
+                (status, last_updated, ticket_id)
+            )
+            return cursor.rowcount > 0
+
+    def transition_complaints(self, ticket_ids, changes, from_statuses=None):
+        ticket_ids = list(ticket_ids)
+        if not ticket_ids:
+            return []
+        where = f"ticket_id IN ({', '.join('?' * len(ticket_ids))})"
+        params = ticket_ids
+        if from_statuses:
+            where += f" AND status IN ({', '.join('?' * len(from_statuses))})"
+            params = ticket_ids + list(from_statuses)
+        columns = [column for column in TRANSITION_COLUMNS if column in changes]
+        with sqlite_connection(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            updated = [row[0] for row in conn.execute(f"SELECT ticket_id FROM complaints WHERE {where}", params)]
+            conn.execute(
+                f"UPDATE complaints SET {', '.join(f'{column} = ?' for column in columns)}, revision = revision + 1 WHERE {where}",
+                [changes[column] for column in columns] + params
+            )
+        return updated
+
+    def buffered_ticket_ids(self, ticket_ids):
+        ticket_ids = list(ticket_ids)
+        if not ticket_ids:
+            return set()
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT ticket_id FROM complaints WHERE ticket_id IN ({', '.join('?' * len(ticket_ids))})", ticket_ids
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    # Oldest complaints first, with the revision each was read at (see discard_complaints)
+    def complaint_batch(self, limit):
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(COMPLAINT_COLUMNS)}, revision FROM complaints ORDER BY ticket_id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(self._record(row[:-1]), row[-1]) for row in rows]
+
+    def changed_complaints(self, after, limit):
+        last_updated, ticket_id = after or ("", "")
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(CHANGE_COLUMNS)} FROM complaints "
+                "WHERE last_updated > ? OR (last_updated = ? AND ticket_id > ?) ORDER BY last_updated, ticket_id LIMIT ?",
+                (last_updated, last_updated, ticket_id, limit)
+            ).fetchall()
+        return [dict(zip(CHANGE_COLUMNS, row[:1] + (json.loads(row[1]),) + row[2:])) for row in rows]
+
+    def complaints_after(self, ticket_id, limit):
+        with sqlite_connection(self.path) as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(COMPLAINT_COLUMNS)} FROM complaints WHERE ticket_id > ? ORDER BY ticket_id LIMIT ?",
+                (ticket_id or "", limit)
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    # Sets only the category keys inside the JSON columns; returns the ticket IDs stored here
+    def update_complaint_categories(self, records):
+        if not records:
+            return []
+        updates = category_updates(records)
+        ticket_ids = [update['ticket_id'] for update in updates]
+        with sqlite_connection(self.path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            updated = [row[0] for row in conn.execute(
+                f"SELECT ticket_id FROM complaints WHERE ticket_id IN ({', '.join('?' * len(ticket_ids))})", ticket_ids
+            )]
+            conn.executemany(
+                "UPDATE complaints SET "
+                "data = json_set(data, '$.category', ?, '$.category_explanation', ?), "
+                "translated_data = json_set(translated_data, '$.category', ?, '$.category_explanation', ?), "
+                "last_updated = ?, revision = revision + 1 WHERE ticket_id = ?",
+                [(update['category'], update['category_explanation']) * 2 + (update['last_updated'], update['ticket_id'])
+                 for update in updates]
+            )
+        return updated
+
+    # Delete complaints that were not modified since they were read; returns how many were deleted
+    def discard_complaints(self, revisions):
+        with sqlite_connection(self.path) as conn:
+            cursor = conn.executemany("DELETE FROM complaints WHERE ticket_id = ? AND revision = ?", revisions)
+            return cursor.rowcount
+
+    def count_complaints(self):
+        with sqlite_connection(self.path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+
+    def snapshot(self):
+        return {"backend": "sqlite", "complaints": self.count_complaints()}
+
+# Complaints are acknowledged once committed to a local SQLite buffer and flushed to the remote backend in bulk by a
+# background thread, so filing latency does not depend on the remote database. Buffered complaints survive restarts
+# (the next process flushes them). Users always go to the remote backend, since usernames must be unique across hosts.
+class WriteBehindRepository:
+    def __init__(self, buffer, remote, batch_size, flush_seconds):
+        self.buffer = buffer
+        self.remote = remote
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.flushed = 0
+        self.flush_failures = 0
+        self.last_error = None
+        self.last_flush_at = None
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+        self.thread.start()
+
+    def user_exists(self, username):
+        return self.remote.user_exists(username)
+
+    def insert_user(self, username, password, email):
+        self.remote.insert_user(username, password, email)
+
+    def check_credentials(self, username, password):
+        return self.remote.check_credentials(username, password)
+
+    def insert_complaints(self, records):
+        self.buffer.insert_complaints(records)
+        with self._lock:
+            self._unflushed += len(records)
+            if self._unflushed >= self.batch_size:
+                self._wake.set()
+
+    def get_complaint(self, ticket_id):
+        return self.buffer.get_complaint(ticket_id) or self.remote.get_complaint(ticket_id)
+
+    def get_ticket_summary(self, ticket_id):
+        return self.buffer.get_ticket_summary(ticket_id) or self.remote.get_ticket_summary(ticket_id)
+
+    # A still-buffered complaint is updated in the buffer; the bumped revision makes the flusher send the new status
+    def update_complaint_status(self, ticket_id, status, last_updated):
+        return (self.buffer.update_complaint_status(ticket_id, status, last_updated)
+                or self.remote.update_complaint_status(ticket_id, status, last_updated))
+
+    # Buffered tickets are transitioned in the buffer, the rest remotely; holding the flush lock keeps a ticket from
+    # leaving the buffer in between
+    def transition_complaints(self, ticket_ids, changes, from_statuses=None):
+        with self._flush_lock:
+            buffered = self.buffer.buffered_ticket_ids(ticket_ids)
+            updated = self.buffer.transition_complaints(buffered, changes, from_statuses)
+            remote_ids = [ticket_id for ticket_id in ticket_ids if ticket_id not in buffered]
+            if remote_ids:
+                updated += self.remote.transition_complaints(remote_ids, changes, from_statuses)
+        return updated
+
+    # Buffered complaints appear in the remote feed once flushed, stamped with the flush time (see flush)
+    def changed_complaints(self, after, limit):
+        return self.remote.changed_complaints(after, limit)
+
+    # Batch tools page through the remote table; complaints still buffered were categorized when they were filed
+    def complaints_after(self, ticket_id, limit):
+        return self.remote.complaints_after(ticket_id, limit)
+
+    def update_complaint_categories(self, records):
+        with self._flush_lock:
+            updated = self.buffer.update_complaint_categories(records)
+            buffered = set(updated)
+            remote_records = [record for record in records if record['ticket_id'] not in buffered]
+            if remote_records:
+                updated += self.remote.update_complaint_categories(remote_records)
+        return updated
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                with self._lock:
+                    self.flush_failures += 1
+                    self.last_error = str(e)
+                logger.warning("Write-behind flush failed; complaints stay buffered: %s", e)
+
+    # Send everything buffered, batch_size complaints per bulk insert; complaints modified during a flush stay buffered.
+    # last_updated is set to the flush time, so a complaint buffered through a long outage is not sent with a timestamp
+    # older than the change feed's high-water mark (the replica would never see it).
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    self._unflushed = 0
+                batch = self.buffer.complaint_batch(self.batch_size)
+                if not batch:
+                    return
+                flushed_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                self.remote.insert_complaints([dict(record, last_updated=flushed_at) for record, _ in batch])
+                discarded = self.buffer.discard_complaints([(record['ticket_id'], revision) for record, revision in batch])
+                with self._lock:
+                    self.flushed += len(batch)
+                    self.last_error = None
+                    self.last_flush_at = time.time()
+                if len(batch) < self.batch_size or discarded == 0:
+                    return
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self.thread.join()
+        self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "backend": "write_behind",
+                "buffered": self.buffer.count_complaints(),
+                "flushed": self.flushed,
+                "flush_failures": self.flush_failures,
+                "last_error": self.last_error,
+                "last_flush_at": self.last_flush_at,
+            }
+
+@functools.cache
+def get_repository():
+    if config.STORAGE_BACKEND == "sqlite":
+        return SQLiteRepository(config.STORAGE_SQLITE_PATH)
+    if config.STORAGE_BACKEND == "write_behind":
+        return WriteBehindRepository(SQLiteRepository(config.WRITE_BEHIND_BUFFER_PATH), SupabaseRepository(get_supabase()),
+                                     config.WRITE_BEHIND_BATCH_SIZE, config.WRITE_BEHIND_FLUSH_SECONDS)
+    return SupabaseRepository(get_supabase())
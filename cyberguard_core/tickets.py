@@ -0,0 +1,234 @@
+"""Ticket IDs, complaint filing and ticket lookups."""
+import collections
+import dataclasses
+import datetime
+import functools
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import typing
+
+from . import config
+from .errors import StorageError
+from .storage import get_repository
+from .language import translate_batch
+from .notifications import get_outbox, get_outbox_workers
+from .classifier import categorize_complaint
+
+logger = logging.getLogger(__name__)
+
+# Ticket IDs: CYBER- + ULID (48-bit ms timestamp + 80 random bits, Crockford base32) + a Luhn mod 32 check character.
+# IDs sort by filing time, and the check character catches single-character typos and most adjacent swaps.
+TICKET_PREFIX = "CYBER-"
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CROCKFORD_ALIASES = str.maketrans("ILO", "110")
+TICKET_BODY_LENGTH = 26
+LEGACY_TICKET_PATTERN = re.compile(r"CYBER-[0-9A-F]{8}")
+
+def crockford_encode(value, length):
+    symbols = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        symbols.append(CROCKFORD_ALPHABET[digit])
+    return "".join(reversed(symbols))
+
+def luhn_mod32_check(symbols):
+    factor, total = 2, 0
+    for symbol in reversed(symbols):
+        addend = factor * CROCKFORD_ALPHABET.index(symbol)
+        factor = 1 if factor == 2 else 2
+        total += addend // 32 + addend % 32
+    return CROCKFORD_ALPHABET[-total % 32]
+
+# Monotonic ULID generator: IDs minted in the same millisecond increment the random part
+class TicketIdGenerator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self):
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms <= self._last_ms:
+                now_ms, randomness = self._last_ms, self._last_random + 1
+                if randomness >= 1 << 80:
+                    now_ms, randomness = now_ms + 1, int.from_bytes(os.urandom(10), "big")
+            else:
+                randomness = int.from_bytes(os.urandom(10), "big")
+            self._last_ms, self._last_random = now_ms, randomness
+        body = crockford_encode(now_ms, 10) + crockford_encode(randomness, 16)
+        return TICKET_PREFIX + body + luhn_mod32_check(body)
+
+@functools.cache
+def get_ticket_id_generator():
+    return TicketIdGenerator()
+
+def new_ticket_id():
+    return get_ticket_id_generator().new()
+
+# Canonical form of a typed ticket ID: upper case, no spaces or extra dashes, Crockford look-alikes (I, L, O) mapped
+def normalize_ticket_id(raw):
+    text = raw.strip().upper().replace(" ", "")
+    if not text.startswith(TICKET_PREFIX):
+        return text
+    body = text[len(TICKET_PREFIX):].replace("-", "")
+    return text if LEGACY_TICKET_PATTERN.fullmatch(text) else TICKET_PREFIX + body.translate(CROCKFORD_ALIASES)
+
+# Client-side check run before any database lookup; legacy CYBER-XXXXXXXX IDs have no check character
+def is_valid_ticket_id(ticket_id):
+    if LEGACY_TICKET_PATTERN.fullmatch(ticket_id):
+        return True
+    body = ticket_id[len(TICKET_PREFIX):]
+    return (ticket_id.startswith(TICKET_PREFIX) and len(body) == TICKET_BODY_LENGTH + 1
+            and all(c in CROCKFORD_ALPHABET for c in body) and body[0] <= "7"
+            and luhn_mod32_check(body[:-1]) == body[-1])
+
+# Filing time encoded in a ULID ticket ID (None for legacy IDs)
+def ticket_filed_at(ticket_id):
+    if LEGACY_TICKET_PATTERN.fullmatch(ticket_id) or not is_valid_ticket_id(ticket_id):
+        return None
+    millis = 0
+    for symbol in ticket_id[len(TICKET_PREFIX):len(TICKET_PREFIX) + 10]:
+        millis = millis * 32 + CROCKFORD_ALPHABET.index(symbol)
+    return datetime.datetime.fromtimestamp(millis / 1000)
+
+# Result of filing a complaint; `record` is the English complaint as stored, plus ticket ID, status and filing date
+@dataclasses.dataclass
+class Submission:
+    ticket_id: str
+    record: dict
+    email: str = ""
+    email_queued: bool = False
+    email_error: typing.Optional[str] = None
+
+# Complaint storage through the configured repository (see migrations/ for the indexes the Supabase lookups rely on)
+def save_complaint(data, translated_data, language="English"):
+    ticket_id = new_ticket_id()
+    # date_filed is the time encoded in the ticket ID, so ticket order and filing dates always agree
+    now = ticket_filed_at(ticket_id).strftime("%Y-%m-%d %H:%M:%S")
+    complaint_data = {
+        "ticket_id": ticket_id,
+        "data": data,
+        "translated_data": translated_data,
+        "status": "Under Investigation",
+        "date_filed": now,
+        "last_updated": now,
+    }
+    try:
+        get_repository().insert_complaints([complaint_data])
+    except Exception as e:
+        raise StorageError(f"Failed to save complaint: {e}") from e
+    submission = Submission(ticket_id, dict(translated_data, ticket_id=ticket_id, status="Under Investigation", date_filed=now))
+
+    # Email and tips are handed to the outbox so the ticket ID is returned as soon as the insert commits
+    submission.email = translated_data.get('email', '')
+    category = translated_data.get('category', 'Other')
+    if submission.email:
+        try:
+            get_outbox().enqueue(ticket_id, "confirmation_email", {
+                "to_email": submission.email, "ticket_id": ticket_id, "category": category,
+                "date_filed": now, "language": language
+            })
+            get_outbox_workers()
+            submission.email_queued = True
+        except sqlite3.Error as e:
+            logger.warning("Confirmation email for %s could not be queued: %s", ticket_id, e)
+            submission.email_error = str(e)
+    return submission
+
+# Categorize (unless the chatbot already did), translate to English and store a complaint
+def file_complaint(data, language="English", translated_data=None, on_chunk=None):
+    data = dict(data)
+    if 'category' not in data:
+        data['category'], data['category_explanation'] = categorize_complaint(data, on_chunk=on_chunk)
+    if translated_data is None:
+        translated_data = translate_batch(data, language, "English")
+    return save_complaint(data, translated_data, language)
+
+def fetch_complaint(ticket_id):
+    try:
+        return get_repository().get_complaint(ticket_id)
+    except Exception as e:
+        raise StorageError(f"Failed to fetch complaint: {e}") from e
+
+# Read-through TTL cache of ticket summaries, so repeated tracking lookups (e.g. Streamlit reruns) do not re-query storage.
+# invalidate() only reaches this process's cache; an update made by another process is visible once the TTL runs out.
+class TicketCache:
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, ticket_id, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(ticket_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader(ticket_id)
+        # Unknown tickets are not cached: a typo corrected a moment later must not see a stale miss
+        if value is not None:
+            with self._lock:
+                self._entries[ticket_id] = (now + self.ttl_seconds, value)
+                self._entries.move_to_end(ticket_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, ticket_id):
+        with self._lock:
+            self._entries.pop(ticket_id, None)
+
+    def snapshot(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+@functools.cache
+def get_ticket_cache():
+    return TicketCache(config.TICKET_CACHE_TTL_SECONDS, config.TICKET_CACHE_MAX_ENTRIES)
+
+def load_ticket_summary(ticket_id):
+    return get_repository().get_ticket_summary(ticket_id)
+
+def fetch_ticket_summary(ticket_id):
+    try:
+        return get_ticket_cache().get(ticket_id, load_ticket_summary)
+    except Exception as e:
+        raise StorageError(f"Failed to fetch complaint: {e}") from e
+
+# Status changes go through here so this process's cached summaries never show an outdated status
+def update_complaint_status(ticket_id, status):
+    try:
+        get_repository().update_complaint_status(ticket_id, status, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    except Exception as e:
+        raise StorageError(f"Failed to update complaint status: {e}") from e
+    finally:
+        get_ticket_cache().invalidate(ticket_id)
+
+# Bulk status change, e.g. from the admin work queue: one conditional UPDATE per STATUS_UPDATE_BATCH_SIZE tickets instead
+# of a round trip per ticket. Only tickets currently in one of from_statuses (if given) change; `fields` may also set
+# assigned_to. Returns the ticket IDs that were updated.
+def update_complaint_statuses(ticket_ids, status, from_statuses=None, **fields):
+    changes = dict(fields, status=status, last_updated=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    updated = []
+    try:
+        for start in range(0, len(ticket_ids), config.STATUS_UPDATE_BATCH_SIZE):
+            batch = ticket_ids[start:start + config.STATUS_UPDATE_BATCH_SIZE]
+            updated += get_repository().transition_complaints(batch, changes, from_statuses)
+    except Exception as e:
+        raise StorageError(f"Failed to update complaint statuses: {e}") from e
+    finally:
+        for ticket_id in ticket_ids:
+            get_ticket_cache().invalidate(ticket_id)
+    return updated
@@ -0,0 +1,137 @@
+"""Admin work queue: open tickets in priority order, claiming without double assignment, and bulk status changes."""
+import datetime
+import functools
+import heapq
+import threading
+import time
+
+from . import config
+from .replica import get_replica
+from .tickets import update_complaint_statuses
+
+OPEN_STATUS = "Under Investigation"
+ASSIGNED_STATUS = "Assigned"
+ADMIN_STATUSES = (OPEN_STATUS, ASSIGNED_STATUS, "Resolved", "Closed")
+
+def static_points(record):
+    translated_data = record.get('translated_data') or {}
+    points = config.WORK_QUEUE_CATEGORY_POINTS.get(record.get('category') or translated_data.get('category'), 0)
+    for field, flag_points in config.WORK_QUEUE_FLAG_POINTS.items():
+        if str(translated_data.get(field, "")).strip().lower() == "yes":
+            points += flag_points
+    return points
+
+def filed_days(record):
+    try:
+        return datetime.datetime.fromisoformat(str(record['date_filed'])).timestamp() / 86400
+    except (KeyError, ValueError):
+        return time.time() / 86400
+
+# Priority at time t is static_points + rate * (t - filed). The age term grows at the same rate for every ticket, so
+# ranking by static_points - rate * filed never changes and the heap never needs re-keying as tickets wait.
+def priority_key(record):
+    return config.WORK_QUEUE_AGE_POINTS_PER_DAY * filed_days(record) - static_points(record)
+
+def priority_at(key, now=None):
+    return config.WORK_QUEUE_AGE_POINTS_PER_DAY * (now or time.time()) / 86400 - key
+
+# Min-heap of open tickets loaded from the read replica. The heap is only this process's view; a claim is a
+# conditional status change in the database, so a ticket another process already claimed is skipped, not assigned twice.
+class WorkQueue:
+    def __init__(self, replica, refresh_seconds):
+        self.replica = replica
+        self.refresh_seconds = refresh_seconds
+        self.claimed = 0
+        self.claim_conflicts = 0
+        self._heap = []
+        self._tickets = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        tickets = {record['ticket_id']: record for record in self.replica.complaints_with_status(OPEN_STATUS)}
+        heap = [(priority_key(record), ticket_id) for ticket_id, record in tickets.items()]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap, self._tickets, self._loaded_at = heap, tickets, time.monotonic()
+
+    def _ensure_fresh(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self.refresh()
+
+    def _entry(self, key, ticket_id):
+        record = self._tickets.get(ticket_id, {})
+        return {
+            "ticket_id": ticket_id,
+            "priority": round(priority_at(key), 1),
+            "category": record.get('category'),
+            "date_filed": record.get('date_filed'),
+        }
+
+    def peek(self, limit):
+        self._ensure_fresh()
+        with self._lock:
+            top = heapq.nsmallest(limit, self._heap)
+        return [self._entry(key, ticket_id) for key, ticket_id in top]
+
+    # Claim the `count` highest-priority open tickets for `assignee`; candidates are claimed in one conditional batch,
+    # and tickets lost to another investigator are dropped and replaced by the next ones in line
+    def claim(self, assignee, count=1):
+        self._ensure_fresh()
+        claimed = []
+        while len(claimed) < count:
+            with self._lock:
+                candidates = [heapq.heappop(self._heap) for _ in range(min(count - len(claimed), len(self._heap)))]
+            if not candidates:
+                break
+            try:
+                won = set(apply_transition(self.replica, [ticket_id for _, ticket_id in candidates], ASSIGNED_STATUS,
+                                           from_statuses=[OPEN_STATUS], assigned_to=assignee))
+            except Exception:
+                with self._lock:
+                    for candidate in candidates:
+                        heapq.heappush(self._heap, candidate)
+                raise
+            claimed += [self._entry(key, ticket_id) for key, ticket_id in candidates if ticket_id in won]
+            with self._lock:
+                self.claimed += len(won)
+                self.claim_conflicts += len(candidates) - len(won)
+        return claimed
+
+    # Reload on next use, e.g. after tickets were reopened
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open": len(self._heap),
+                "claimed": self.claimed,
+                "claim_conflicts": self.claim_conflicts,
+                "loaded_seconds_ago": time.monotonic() - self._loaded_at if self._loaded_at is not None else None,
+            }
+
+@functools.cache
+def get_work_queue():
+    return WorkQueue(get_replica(), config.WORK_QUEUE_REFRESH_SECONDS)
+
+# Status change applied to storage in batches and written through to `replica`; returns the ticket IDs that changed
+def apply_transition(replica, ticket_ids, status, from_statuses=None, **fields):
+    updated = update_complaint_statuses(ticket_ids, status, from_statuses, **fields)
+    if updated:
+        last_updated = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        replica.apply_changes(updated, dict(fields, status=status, last_updated=last_updated))
+    return updated
+
+# Bulk status change by an admin (resolve, close, reopen, reassign); reopening a ticket clears its assignee
+def transition(ticket_ids, status, from_statuses=None, **fields):
+    if status not in ADMIN_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(ADMIN_STATUSES)}")
+    if status == OPEN_STATUS:
+        fields['assigned_to'] = None
+    queue = get_work_queue()
+    updated = apply_transition(queue.replica, ticket_ids, status, from_statuses, **fields)
+    if updated:
+        queue.invalidate()
+    return updated
@@ -0,0 +1,23 @@
+-- Indexes for the complaints table lookup paths. Run once in the Supabase SQL editor (or psql).
+--
+-- Ticket IDs are CYBER- + a ULID + a check character (see new_ticket_id in cyberguard_core/tickets.py). The leading
+-- ULID characters encode the filing time, so btree order on ticket_id is also filing order, and new rows
+-- append at the right edge of the index instead of splitting random pages.
+--
+-- CONCURRENTLY builds without blocking inserts; it cannot run inside a transaction block.
+
+-- Track page / admin lookups: .eq('ticket_id', ...) becomes a unique index probe, O(log n).
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS complaints_ticket_id_key
+    ON complaints (ticket_id);
+
+-- Date-range scans (admin filters, reporting, incremental sync). date_filed and last_updated are stored
+-- as 'YYYY-MM-DD HH:MM:SS', which sorts the same lexically and chronologically.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS complaints_date_filed_idx
+    ON complaints (date_filed);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS complaints_last_updated_idx
+    ON complaints (last_updated);
+
+-- Verify with e.g.:
+--   EXPLAIN SELECT * FROM complaints WHERE ticket_id = 'CYBER-01HZX3K8Q5M2V7C9T4N6B1R0WAG';
+--   EXPLAIN SELECT ticket_id FROM complaints WHERE date_filed >= '2025-01-01' AND date_filed < '2025-02-01';
+-- Both should show an Index Scan rather than a Seq Scan.
@@ -0,0 +1,14 @@
+-- Index for the incremental change feed read by the admin read replica (cyberguard_core/replica.py).
+--
+-- Each sync pages through complaints with a (last_updated, ticket_id) keyset cursor:
+--   WHERE last_updated > $1 OR (last_updated = $1 AND ticket_id > $2) ORDER BY last_updated, ticket_id LIMIT n
+-- The composite index serves both the filter and the order, so a sync reads only the changed rows, however
+-- large the table is. It supersedes complaints_last_updated_idx from 001, which can be dropped afterwards.
+--
+-- CONCURRENTLY builds without blocking inserts; it cannot run inside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS complaints_change_feed_idx
+    ON complaints (last_updated, ticket_id);
+
+-- Optional, once the new index is valid:
+--   DROP INDEX CONCURRENTLY IF EXISTS complaints_last_updated_idx;
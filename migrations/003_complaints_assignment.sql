@@ -0,0 +1,14 @@
+-- Assignment column for the admin work queue (cyberguard_core/workqueue.py). Run once before enabling it.
+--
+-- Claiming a ticket is one conditional UPDATE for the whole batch:
+--   UPDATE complaints SET status = 'Assigned', assigned_to = $1, last_updated = $2
+--   WHERE ticket_id IN (...) AND status = 'Under Investigation'
+-- Postgres locks each matched row, so when two investigators race for the same ticket only one UPDATE still sees it
+-- 'Under Investigation'; the other skips it and takes the next ticket in line. No ticket is assigned twice.
+-- The ticket_id IN (...) lookups use the unique index from 001.
+
+ALTER TABLE complaints ADD COLUMN IF NOT EXISTS assigned_to text;
+
+-- Investigator views ("my tickets") filter by assignee; open tickets have none, so the partial index stays small.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS complaints_assigned_to_idx
+    ON complaints (assigned_to) WHERE assigned_to IS NOT NULL;
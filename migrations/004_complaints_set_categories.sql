@@ -0,0 +1,23 @@
+-- Category write-back for tools/batch_categorize.py --write-back (SupabaseRepository.update_complaint_categories).
+-- Run once before using it.
+--
+-- Re-categorization must not revert changes made while the tool runs. The function sets only the category and
+-- category_explanation keys inside data and translated_data, plus last_updated. It never touches status,
+-- assigned_to or other JSON keys, and rows deleted meanwhile are skipped rather than re-inserted.
+-- `updates` is a JSON array of {"ticket_id", "category", "category_explanation", "last_updated"} objects; the
+-- function returns the ticket IDs it updated. Lookups use the unique ticket_id index from 001.
+
+CREATE OR REPLACE FUNCTION set_complaint_categories(updates jsonb)
+RETURNS SETOF text
+LANGUAGE sql
+AS $$
+    UPDATE complaints AS c
+    SET data = jsonb_set(jsonb_set(coalesce(c.data, '{}'::jsonb), '{category}', u -> 'category'),
+                         '{category_explanation}', u -> 'category_explanation'),
+        translated_data = jsonb_set(jsonb_set(coalesce(c.translated_data, '{}'::jsonb), '{category}', u -> 'category'),
+                                    '{category_explanation}', u -> 'category_explanation'),
+        last_updated = (u ->> 'last_updated')::timestamptz
+    FROM jsonb_array_elements(updates) AS u
+    WHERE c.ticket_id = u ->> 'ticket_id'
+    RETURNING c.ticket_id;
+$$;
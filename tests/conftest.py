@@ -0,0 +1,29 @@
+"""Shared test setup for the cyberguard_core engine.
+
+config.py ships with "# name#" placeholders where a deployment fills in its credentials, so the tests load it with
+those left empty. Every test runs in its own temporary directory, which keeps the SQLite files the engine creates
+(prompt cache, outbox, storage, replica) apart.
+"""
+import pathlib
+import re
+import sys
+import types
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+def _load_config():
+    path = ROOT / "cyberguard_core" / "config.py"
+    module = types.ModuleType("cyberguard_core.config")
+    module.__file__ = str(path)
+    exec(compile(re.sub(r"#\s*\w+#", "None", path.read_text(encoding="utf-8")), str(path), "exec"), module.__dict__)
+    sys.modules["cyberguard_core.config"] = module
+
+_load_config()
+
+@pytest.fixture(autouse=True)
+def isolated_workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
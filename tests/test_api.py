@@ -0,0 +1,62 @@
+import base64
+import http.client
+import io
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from cyberguard_core import api, config, storage, tickets
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(config, "LEGACY_TICKET_LOOKUPS_PER_MINUTE", 2)
+    monkeypatch.setattr(api, "generate_complaint_pdf", lambda data: io.BytesIO(b"%PDF " + data['ticket_id'].encode()))
+    cached = (storage.get_repository, tickets.get_ticket_cache, api.get_legacy_lookup_limiter)
+    for function in cached:
+        function.cache_clear()
+    repository = storage.get_repository()
+    repository.insert_user("asha", "s3cret", "asha@example.com")
+    repository.insert_complaints([{
+        "ticket_id": "CYBER-0000ABCD", "data": {}, "translated_data": {"name_phone": "Asha 98xxxxxx"},
+        "status": "Under Investigation", "date_filed": "2024-01-01 10:00:00", "last_updated": "2024-01-01 10:00:00",
+    }])
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.CyberGuardHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+    for function in cached:
+        function.cache_clear()
+
+def request(port, method, path, credentials=None, body=None, headers=None):
+    headers = dict(headers or {})
+    if credentials:
+        headers["Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    result = response.status, response.getheader("WWW-Authenticate"), response.read()
+    conn.close()
+    return result
+
+@pytest.mark.parametrize("credentials", [None, "asha:wrong", "nobody:s3cret"])
+def test_complaint_endpoints_require_sign_in(server, credentials):
+    for method, path in (("GET", "/complaints/CYBER-0000ABCD/pdf"), ("GET", "/complaints/CYBER-0000ABCD"), ("POST", "/complaints")):
+        status, challenge, body = request(server, method, path, credentials, body=b"{}" if method == "POST" else None)
+        assert status == 401 and challenge.startswith("Basic")
+        assert b"Asha" not in body
+
+def test_signed_in_account_gets_the_pdf(server):
+    status, _, body = request(server, "GET", "/complaints/CYBER-0000ABCD/pdf", "asha:s3cret")
+    assert (status, body) == (200, b"%PDF CYBER-0000ABCD")
+
+def test_legacy_ticket_lookups_are_rate_limited(server):
+    statuses = [request(server, "GET", f"/complaints/CYBER-0000ABC{i}", "asha:s3cret")[0] for i in range(4)]
+    assert statuses == [404, 404, 429, 429]
+    assert api.get_legacy_lookup_limiter().rejected == 2
+
+def test_negative_content_length_is_rejected(server):
+    status, _, body = request(server, "POST", "/categorize", headers={"Content-Length": "-1"})
+    assert status == 400 and b"Content-Length" in body
@@ -0,0 +1,19 @@
+import json
+
+from cyberguard_core import classifier
+
+def test_packed_categorization_reads_pack_size_and_priority_at_call_time(monkeypatch):
+    calls = []
+
+    def fake_gemini(prompt, json_output=False, priority=None):
+        count = prompt.count("### Complaint ")
+        calls.append((count, priority))
+        return json.dumps([{"id": i, "category": "Other", "explanation": "Reviewed."} for i in range(count)])
+
+    monkeypatch.setattr(classifier, "get_gemini_response", fake_gemini)
+    monkeypatch.setattr(classifier.config, "CATEGORIZE_PACK_SIZE", 2)
+    monkeypatch.setattr(classifier.config, "PRIORITY_PREFETCH", 7)
+    complaints = [{"incident_description": f"complaint {i}"} for i in range(5)]
+    results = classifier.categorize_complaints_packed(complaints, use_local=False)
+    assert calls == [(2, 7), (2, 7), (1, 7)]
+    assert results == [("Other", "Reviewed.")] * 5
@@ -0,0 +1,37 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from cyberguard_core import evidence
+
+# Bank-app style screenshot: identical header, only the transaction text differs
+def screenshot(text):
+    image = Image.new("RGB", (270, 585), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 270, 60), fill=(20, 60, 160))
+    draw.text((20, 300), text, fill=(0, 0, 0))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def analyze(monkeypatch, files):
+    calls = []
+    monkeypatch.setattr(evidence, "load_evidence_bytes", lambda e: files[e['name']])
+    monkeypatch.setattr(evidence, "get_gemini_response", lambda prompt, **kwargs: calls.append(kwargs) or f"analysis {len(calls)}")
+    analyses = [analysis.split(": ", 1)[1] for analysis in evidence.analyze_evidence_images([{"name": name} for name in files])]
+    return calls, analyses
+
+def test_the_same_image_uploaded_twice_is_analyzed_once(monkeypatch):
+    debit = screenshot("Debited Rs 49,999 UTR 412345678901")
+    calls, analyses = analyze(monkeypatch, {"debit.png": debit, "debit copy.png": debit})
+    assert len(calls) == 1
+    assert analyses == ["analysis 1", "analysis 1"]
+
+def test_similar_screenshots_are_each_analyzed(monkeypatch):
+    calls, analyses = analyze(monkeypatch, {
+        "first.png": screenshot("Debited Rs 49,999 UTR 412345678901"),
+        "second.png": screenshot("Debited Rs 1,20,000 UTR 498765432109"),
+    })
+    assert len(calls) == 2
+    assert calls[0]["file_data"] != calls[1]["file_data"]
+    assert sorted(analyses) == ["analysis 1", "analysis 2"]
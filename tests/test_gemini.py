@@ -0,0 +1,109 @@
+import pytest
+
+from cyberguard_core.errors import GeminiUnavailableError
+from cyberguard_core.gemini import CircuitBreaker, ResilientGeminiClient
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class BlockedResponse:
+    @property
+    def text(self):
+        raise ValueError("response was blocked")
+
+# Stand-in for the Gemini model: each call takes the next scripted outcome (text, a response object or an exception)
+class FakeModel:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def _next(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def generate_content(self, contents, generation_config=None, request_options=None, stream=False):
+        outcome = self._next()
+        if stream:
+            return [FakeResponse(part) for part in outcome.split()] if isinstance(outcome, str) else [outcome]
+        return FakeResponse(outcome) if isinstance(outcome, str) else outcome
+
+def make_client(model, failure_threshold=2, reset_seconds=60.0, max_retries=0):
+    breaker = CircuitBreaker(failure_threshold, reset_seconds)
+    return ResilientGeminiClient(model, 5, 5, max_retries, 0.0, 0.0, breaker)
+
+def open_breaker(client):
+    for _ in range(client.breaker.failure_threshold):
+        with pytest.raises(TimeoutError):
+            client.generate("prompt")
+    assert client.breaker.state == "open"
+
+def start_trial(client):
+    client.breaker.opened_at -= client.breaker.reset_seconds
+
+def test_retries_transient_errors_then_succeeds():
+    model = FakeModel(TimeoutError(), ConnectionError(), "ok")
+    client = make_client(model, failure_threshold=5, max_retries=3)
+    assert client.generate("prompt") == "ok"
+    assert model.calls == 3
+    assert client.snapshot()["retries"] == 2
+    assert client.breaker.state == "closed"
+
+def test_open_breaker_rejects_calls_without_reaching_the_model():
+    model = FakeModel(TimeoutError())
+    client = make_client(model)
+    open_breaker(client)
+    with pytest.raises(GeminiUnavailableError):
+        client.generate("prompt")
+    assert model.calls == 2
+    assert client.snapshot()["rejected"] == 1
+
+def test_half_open_trial_success_closes_breaker():
+    model = FakeModel(TimeoutError(), TimeoutError(), "recovered")
+    client = make_client(model)
+    open_breaker(client)
+    start_trial(client)
+    assert client.generate("prompt") == "recovered"
+    assert client.breaker.state == "closed"
+
+def test_half_open_trial_transient_failure_reopens_breaker():
+    model = FakeModel(TimeoutError())
+    client = make_client(model)
+    open_breaker(client)
+    start_trial(client)
+    with pytest.raises(TimeoutError):
+        client.generate("prompt")
+    assert client.breaker.state == "open"
+    assert client.breaker.trips == 2
+
+def test_half_open_trial_with_blocked_response_settles_breaker():
+    model = FakeModel(TimeoutError(), TimeoutError(), BlockedResponse(), "next")
+    client = make_client(model)
+    open_breaker(client)
+    start_trial(client)
+    with pytest.raises(ValueError):
+        client.generate("prompt")
+    assert client.breaker.state == "closed"
+    assert client.generate("prompt") == "next"
+
+def test_half_open_stream_abandoned_by_caller_settles_breaker():
+    model = FakeModel(TimeoutError(), TimeoutError(), "several streamed words")
+    client = make_client(model)
+    open_breaker(client)
+    start_trial(client)
+    stream = client.generate_stream("prompt")
+    assert next(stream) == "several"
+    stream.close()
+    assert client.breaker.state == "closed"
+
+def test_unsettled_trial_is_replaced_after_reset_interval():
+    breaker = CircuitBreaker(1, 60.0)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.opened_at -= 60
+    assert breaker.allow()
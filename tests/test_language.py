@@ -0,0 +1,22 @@
+import pytest
+
+from cyberguard_core.language import extract_yes_no
+
+@pytest.mark.parametrize("response, lang, expected", [
+    ("Yes.", "English", "yes"),
+    ("  nope!", "English", "no"),
+    ("जी हाँ", "Hindi", "yes"),
+    ("illai", "Tamil", "no"),
+    ("no", "Hindi", "no"),
+])
+def test_bare_answers_are_decided_locally(response, lang, expected):
+    assert extract_yes_no(response, lang) == expected
+
+@pytest.mark.parametrize("response", [
+    "no, but my daughter was threatened",
+    "yes they did not pay",
+    "not sure",
+    "",
+])
+def test_qualified_answers_go_to_the_llm(response):
+    assert extract_yes_no(response, "English") is None
@@ -0,0 +1,230 @@
+import os
+import smtplib
+import sqlite3
+import time
+from email.mime.text import MIMEText
+
+import pytest
+
+from cyberguard_core import notifications
+from cyberguard_core.notifications import Outbox, OutboxWorkerPool, SMTPPool
+
+# In-memory SMTP server session; `script` holds exceptions raised by the next send_message calls (None = deliver)
+class FakeSMTP:
+    instances = []
+    script = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("closed")
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        error = FakeSMTP.script.pop(0) if FakeSMTP.script else None
+        if error is not None:
+            raise error
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.script = []
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+def message(to):
+    msg = MIMEText("body")
+    msg["To"] = to
+    return msg
+
+def make_outbox(max_attempts=3):
+    return Outbox("outbox.db", max_attempts, retry_base_seconds=0.0, lease_seconds=60)
+
+def test_pool_reuses_one_session_across_batches(fake_smtp):
+    pool = SMTPPool("smtp.test", 25, "", "", False, 2)
+    assert pool.send_batch([message("a@x"), message("b@x")]) == [None, None]
+    assert pool.send_batch([message("c@x")]) == [None]
+    assert len(fake_smtp.instances) == 1
+    assert fake_smtp.instances[0].sent == ["a@x", "b@x", "c@x"]
+    assert pool.snapshot()["connections_opened"] == 1
+
+def test_pool_reconnects_after_dropped_connection(fake_smtp):
+    fake_smtp.script = [None, smtplib.SMTPServerDisconnected("dropped")]
+    pool = SMTPPool("smtp.test", 25, "", "", False, 1)
+    assert pool.send_batch([message("a@x"), message("b@x")]) == [None, None]
+    stats = pool.snapshot()
+    assert stats["reconnects"] == 1
+    assert stats["messages_sent"] == 2
+    assert fake_smtp.instances[1].sent == ["b@x"]
+
+def test_pool_fails_only_the_refused_recipient(fake_smtp):
+    fake_smtp.script = [smtplib.SMTPRecipientsRefused({"bad@x": (550, b"no such user")})]
+    pool = SMTPPool("smtp.test", 25, "", "", False, 1)
+    errors = pool.send_batch([message("bad@x"), message("good@x")])
+    assert errors[0] is not None and errors[1] is None
+    assert len(fake_smtp.instances) == 1
+
+def test_outbox_claim_leases_jobs_of_one_kind():
+    outbox = make_outbox()
+    outbox.enqueue("T1", "confirmation_email", {"to": "a"})
+    outbox.enqueue("T2", "other", {"to": "b"})
+    outbox.enqueue("T3", "confirmation_email", {"to": "c"})
+    jobs = outbox.claim_batch(10)
+    assert [job["ticket_id"] for job in jobs] == ["T1", "T3"]
+    assert all(job["attempts"] == 1 for job in jobs)
+    assert [job["ticket_id"] for job in outbox.claim_batch(10)] == ["T2"]
+    assert outbox.claim_batch(10) == []
+
+def test_outbox_retries_then_marks_failed():
+    outbox = make_outbox(max_attempts=2)
+    outbox.enqueue("T1", "confirmation_email", {})
+    job = outbox.claim_batch(1)[0]
+    outbox.fail(job, "smtp down")
+    assert outbox.counts() == {"pending": 1}
+    job = outbox.claim_batch(1)[0]
+    outbox.fail(job, "smtp down")
+    assert outbox.counts() == {"failed": 1}
+    assert outbox.status("T1")[0]["last_error"] == "smtp down"
+
+def test_outbox_reclaims_expired_lease():
+    outbox = Outbox("outbox.db", 3, retry_base_seconds=0.0, lease_seconds=0)
+    outbox.enqueue("T1", "confirmation_email", {})
+    assert outbox.claim_batch(1)
+    time.sleep(0.01)
+    reclaimed = outbox.claim_batch(1)
+    assert [job["attempts"] for job in reclaimed] == [2]
+
+def test_workers_deliver_and_retry_failed_jobs():
+    outbox = make_outbox()
+    delivered = []
+    failures = {"T2": 1}
+
+    def handler(payloads):
+        errors = []
+        for payload in payloads:
+            if failures.get(payload["ticket_id"], 0) > 0:
+                failures[payload["ticket_id"]] -= 1
+                errors.append("temporary failure")
+            else:
+                delivered.append(payload["ticket_id"])
+                errors.append(None)
+        return errors
+
+    for ticket_id in ("T1", "T2", "T3"):
+        outbox.enqueue(ticket_id, "confirmation_email", {"ticket_id": ticket_id})
+    pool = OutboxWorkerPool(outbox, {"confirmation_email": handler}, num_workers=2, poll_seconds=0.01, batch_size=10)
+    try:
+        deadline = time.monotonic() + 5
+        while outbox.counts().get("done", 0) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    assert sorted(delivered) == ["T1", "T2", "T3"]
+    assert outbox.counts() == {"done": 3}
+    assert [job["attempts"] for job in outbox.status("T2")] == [2]
+
+def test_delivery_handler_builds_one_message_per_payload(fake_smtp, monkeypatch):
+    monkeypatch.setattr(notifications, "build_confirmation_email", lambda to_email, *args: message(to_email))
+    notifications.get_smtp_pool.cache_clear()
+    try:
+        errors = notifications.deliver_confirmation_emails([
+            {"to_email": "a@x", "ticket_id": "T1", "category": "Other"},
+            {"to_email": "b@x", "ticket_id": "T2", "category": "Other"},
+        ])
+    finally:
+        notifications.get_smtp_pool.cache_clear()
+    assert errors == [None, None]
+    assert fake_smtp.instances[0].sent == ["a@x", "b@x"]
+
+def test_workers_survive_database_errors_after_claiming(monkeypatch):
+    outbox = make_outbox()
+    outbox.enqueue("T1", "confirmation_email", {"ticket_id": "T1"})
+    complete_many = outbox.complete_many
+    locked = {"count": 1}
+
+    def flaky_complete_many(job_ids):
+        if locked["count"]:
+            locked["count"] -= 1
+            raise sqlite3.OperationalError("database is locked")
+        complete_many(job_ids)
+
+    monkeypatch.setattr(outbox, "complete_many", flaky_complete_many)
+    monkeypatch.setattr(outbox, "lease_seconds", 0.05)
+    pool = OutboxWorkerPool(outbox, {"confirmation_email": lambda payloads: [None] * len(payloads)},
+                            num_workers=1, poll_seconds=0.01, batch_size=10)
+    try:
+        deadline = time.monotonic() + 5
+        while outbox.counts().get("done", 0) < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+    # The worker kept running, and the job it could not settle was reclaimed after its lease expired
+    assert outbox.counts() == {"done": 1}
+
+@pytest.fixture
+def counted_tips(monkeypatch):
+    calls = []
+
+    def fake_gemini(prompt, use_cache=True, priority=None):
+        calls.append(prompt)
+        time.sleep(0.001)
+        return "1. Tip"
+
+    monkeypatch.setattr(notifications, "get_gemini_response", fake_gemini)
+    return calls
+
+def test_tips_catalog_refreshes_once_across_processes(counted_tips):
+    # Each catalog stands in for a worker process: same file, own lease holder, own background refresher
+    catalogs = [notifications.TipsCatalog("tips.json", 3600, 600) for _ in range(3)]
+    expected = len(notifications.config.VALID_CATEGORIES) * len(notifications.languages)
+    deadline = time.monotonic() + 10
+    while len(counted_tips) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    assert [catalog.refresh_if_stale() for catalog in catalogs] == [False, False, False]
+    assert len(counted_tips) == expected
+    assert all(catalog.lookup("Other") == "1. Tip" for catalog in catalogs)
+
+def test_tips_catalog_skips_refresh_while_another_process_holds_the_lease(counted_tips, monkeypatch):
+    monkeypatch.setattr(notifications.threading.Thread, "start", lambda self: None)
+    holder = notifications.TipsCatalog("tips.json", 3600, 600)
+    other = notifications.TipsCatalog("tips.json", 3600, 600)
+    assert holder._acquire_lease()
+    assert other.refresh_if_stale() is False
+    holder._release_lease()
+    assert other.refresh_if_stale() is True
+    assert holder.refresh_if_stale() is False
+
+def test_tips_catalog_is_not_published_when_every_call_fails(monkeypatch):
+    monkeypatch.setattr(notifications.threading.Thread, "start", lambda self: None)
+    replies = {"text": None}
+    monkeypatch.setattr(notifications, "get_gemini_response",
+                        lambda prompt, use_cache=True, priority=None: replies["text"] if "'Other'" not in prompt else None)
+    catalog = notifications.TipsCatalog("tips.json", 3600, 600)
+    assert catalog.refresh_if_stale() is False
+    assert not os.path.exists("tips.json") and catalog.age() > 3600
+    replies["text"] = "1. Fresh tip"
+    assert catalog.refresh_if_stale() is True
+    # Categories that failed this time are not published; lookups fall back as before
+    assert catalog.lookup("Financial Fraud") == "1. Fresh tip"
+    assert catalog.lookup("Other") == notifications.config.DEFAULT_TIPS
+    replies["text"] = None
+    assert catalog.refresh() == 0
+    assert catalog.lookup("Financial Fraud") == "1. Fresh tip"
@@ -0,0 +1,14 @@
+from cyberguard_core import pdf
+
+def test_stored_complaint_pdf_carries_ticket_fields_and_is_cached(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(pdf, "render_complaint_pdf", lambda rows: rendered.append(dict(rows)) or b"%PDF")
+    record = {"ticket_id": "CYBER-01", "status": "Assigned", "date_filed": "2026-10-18 06:54:37",
+              "last_updated": "2026-10-18 07:00:00", "translated_data": {"email": "a@example.com", "category": "Other"}}
+    for _ in range(2):
+        assert pdf.generate_complaint_pdf(pdf.stored_complaint_pdf_data(record)).getvalue() == b"%PDF"
+    assert len(rendered) == 1
+    assert rendered[0]["Ticket Number"] == "CYBER-01"
+    assert rendered[0]["Date Filed"] == "2026-10-18 06:54:37"
+    assert rendered[0]["Status"] == "Assigned"
+    assert "ticket_id" not in record["translated_data"]
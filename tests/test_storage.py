@@ -0,0 +1,59 @@
+import datetime
+import types
+
+from cyberguard_core.replica import ComplaintReplica
+from cyberguard_core.storage import SQLiteRepository, SupabaseRepository, WriteBehindRepository
+
+def complaint(ticket_id, last_updated):
+    return {"ticket_id": ticket_id, "data": {}, "translated_data": {"category": "Other"}, "status": "Under Investigation",
+            "date_filed": last_updated, "last_updated": last_updated}
+
+def hours_ago(hours):
+    return (datetime.datetime.now() - datetime.timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+
+def test_complaints_buffered_through_an_outage_reach_the_replica():
+    remote = SQLiteRepository("remote.db")
+    repository = WriteBehindRepository(SQLiteRepository("buffer.db"), remote, batch_size=100, flush_seconds=3600)
+    replica = ComplaintReplica("replica.db", page_size=10, overlap_seconds=300)
+    remote.insert_complaints([complaint("CYBER-B", hours_ago(2))])
+    replica.sync(remote)
+    # Filed hours before the flush that finally reaches the remote, well outside the replica's overlap window
+    filed = hours_ago(6)
+    repository.insert_complaints([complaint("CYBER-A", filed)])
+    remote.insert_complaints([complaint("CYBER-C", hours_ago(1))])
+    replica.sync(remote)
+    repository.flush()
+    assert remote.get_complaint("CYBER-A")["last_updated"] > hours_ago(1)
+    assert remote.get_complaint("CYBER-A")["date_filed"] == filed
+    replica.sync(remote)
+    assert replica.get("CYBER-A") is not None
+    assert repository.buffer.count_complaints() == 0
+
+def test_category_write_back_keeps_concurrent_status_changes():
+    repository = SQLiteRepository("store.db")
+    repository.insert_complaints([complaint("CYBER-A", hours_ago(1))])
+    stale = repository.complaints_after(None, 10)[0]
+    repository.transition_complaints(["CYBER-A"], {"status": "Assigned", "assigned_to": "inspector", "last_updated": hours_ago(0)})
+    recategorized = dict(stale, translated_data=dict(stale['translated_data'], category="Financial Fraud",
+                                                     category_explanation="Money was taken."), last_updated=hours_ago(0))
+    assert repository.update_complaint_categories([recategorized]) == ["CYBER-A"]
+    stored = repository.get_complaint("CYBER-A")
+    assert (stored['status'], stored['assigned_to']) == ("Assigned", "inspector")
+    assert stored['translated_data'] == {"category": "Financial Fraud", "category_explanation": "Money was taken."}
+    assert stored['data'] == {"category": "Financial Fraud", "category_explanation": "Money was taken."}
+
+class FakeRpcClient:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return types.SimpleNamespace(execute=lambda: types.SimpleNamespace(data=[u['ticket_id'] for u in params['updates']]))
+
+def test_supabase_category_write_back_sends_only_category_fields():
+    client = FakeRpcClient()
+    record = dict(complaint("CYBER-A", hours_ago(0)), translated_data={"category": "Other", "category_explanation": "x", "email": "a@b"})
+    assert SupabaseRepository(client).update_complaint_categories([record]) == ["CYBER-A"]
+    assert client.calls == [("set_complaint_categories", {"updates": [{
+        "ticket_id": "CYBER-A", "category": "Other", "category_explanation": "x", "last_updated": record['last_updated'],
+    }]})]
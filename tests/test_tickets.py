@@ -0,0 +1,15 @@
+import datetime
+
+from cyberguard_core import config, storage, tickets
+
+def test_date_filed_is_the_time_encoded_in_the_ticket_id(monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    storage.get_repository.cache_clear()
+    try:
+        submission = tickets.save_complaint({"incident_description": "x"}, {"incident_description": "x"})
+    finally:
+        storage.get_repository.cache_clear()
+    filed_at = tickets.ticket_filed_at(submission.ticket_id)
+    assert submission.record['date_filed'] == filed_at.strftime("%Y-%m-%d %H:%M:%S")
+    assert abs(datetime.datetime.now() - filed_at) < datetime.timedelta(seconds=5)
+    assert tickets.ticket_filed_at("CYBER-0000ABCD") is None
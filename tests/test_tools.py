@@ -0,0 +1,17 @@
+from cyberguard_core import config, storage
+from tools import train_category_model
+
+def test_training_reads_every_stored_ticket_once(monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(train_category_model, "PAGE_SIZE", 2)
+    storage.get_repository.cache_clear()
+    try:
+        storage.get_repository().insert_complaints([{
+            "ticket_id": f"CYBER-{i}", "data": {}, "translated_data": {"category": "Other", "n": i},
+            "status": "Resolved", "date_filed": "2026-10-01 10:00:00", "last_updated": "2026-10-01 10:00:00",
+        } for i in range(5)])
+        labeled = list(train_category_model.read_storage())
+    finally:
+        storage.get_repository.cache_clear()
+    assert sorted(data["n"] for data, _ in labeled) == [0, 1, 2, 3, 4]
+    assert {label for _, label in labeled} == {"Other"}
@@ -0,0 +1,72 @@
+import datetime
+import threading
+
+import pytest
+
+from cyberguard_core import config, replica, storage, tickets, workqueue
+from cyberguard_core.replica import ComplaintReplica
+from cyberguard_core.workqueue import ASSIGNED_STATUS, OPEN_STATUS, WorkQueue
+
+@pytest.fixture
+def sqlite_store(monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "sqlite")
+    cached = (storage.get_repository, replica.get_replica, workqueue.get_work_queue, tickets.get_ticket_cache)
+    for function in cached:
+        function.cache_clear()
+    yield storage.get_repository()
+    for function in cached:
+        function.cache_clear()
+
+def file_open_tickets(repository, count):
+    filed = datetime.datetime(2026, 10, 1)
+    repository.insert_complaints([{
+        "ticket_id": f"CYBER-{i:03d}", "data": {}, "translated_data": {"category": "Financial Fraud"},
+        "status": OPEN_STATUS, "date_filed": str(filed + datetime.timedelta(minutes=i)), "last_updated": str(filed),
+    } for i in range(count)])
+
+# Each queue stands in for a separate app process: its own replica file and heap, loaded before anyone claims
+def process_queue(repository, name):
+    local_replica = ComplaintReplica(f"{name}.db", page_size=100, overlap_seconds=0)
+    local_replica.sync(repository)
+    queue = WorkQueue(local_replica, refresh_seconds=3600)
+    queue.refresh()
+    return queue
+
+def test_a_stale_queue_skips_tickets_claimed_by_another_process(sqlite_store):
+    file_open_tickets(sqlite_store, 6)
+    first, second = process_queue(sqlite_store, "first"), process_queue(sqlite_store, "second")
+    claimed_first = [entry['ticket_id'] for entry in first.claim("alice", 3)]
+    claimed_second = [entry['ticket_id'] for entry in second.claim("bob", 3)]
+    assert claimed_first == ["CYBER-000", "CYBER-001", "CYBER-002"]
+    assert claimed_second == ["CYBER-003", "CYBER-004", "CYBER-005"]
+    assert (second.claimed, second.claim_conflicts) == (3, 3)
+    assert sqlite_store.get_complaint("CYBER-001")['assigned_to'] == "alice"
+    # Claims are written through to the claiming process's own replica
+    assert first.replica.get("CYBER-001")['assigned_to'] == "alice"
+    assert second.replica.get("CYBER-004")['status'] == ASSIGNED_STATUS
+    assert second.replica.get("CYBER-001")['status'] == OPEN_STATUS
+
+def test_concurrent_claims_never_assign_a_ticket_twice(sqlite_store):
+    file_open_tickets(sqlite_store, 40)
+    queues = [process_queue(sqlite_store, "first"), process_queue(sqlite_store, "second")]
+    claims = {}
+
+    def claim_all(queue, assignee):
+        claims[assignee] = []
+        while batch := queue.claim(assignee, 2):
+            claims[assignee] += [entry['ticket_id'] for entry in batch]
+
+    threads = [threading.Thread(target=claim_all, args=(queue, assignee)) for queue, assignee in zip(queues, ("alice", "bob"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    everything = claims["alice"] + claims["bob"]
+    assert sorted(everything) == [f"CYBER-{i:03d}" for i in range(40)]
+    for assignee, ticket_ids in claims.items():
+        for ticket_id in ticket_ids:
+            stored = sqlite_store.get_complaint(ticket_id)
+            assert (stored['status'], stored['assigned_to']) == (ASSIGNED_STATUS, assignee)
+    for queue, assignee in zip(queues, ("alice", "bob")):
+        assert {row['ticket_id'] for row in queue.replica.query(limit=100, assigned_to=assignee)} == set(claims[assignee])
+    assert sum(queue.claimed for queue in queues) == 40
@@ -0,0 +1,198 @@
+"""Offline batch (re-)categorization of complaints, e.g. to re-triage a backlog after prompt changes.
+
+Usage:
+    python -m tools.batch_categorize --input complaints.jsonl --output results.jsonl
+    python -m tools.batch_categorize --input export.csv --output results.jsonl --no-local
+    python -m tools.batch_categorize --from-storage --write-back --concurrency 8
+
+--from-storage and --write-back use the storage backend selected by config.STORAGE_BACKEND. Write-back only
+sets the category fields and last_updated, so status changes and claims made while the tool runs are kept.
+
+Progress is checkpointed (one processed key per line), so rerunning the same command after a crash
+resumes where it stopped. Rows are only checkpointed once their results have been written.
+"""
+import argparse
+import csv
+import datetime
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from cyberguard_core import classifier, config, language
+from cyberguard_core.storage import get_repository
+
+PAGE_SIZE = 500
+JSON_COLUMNS = ("data", "translated_data")
+
+# Complaint rows or flat complaint dicts, one JSON object per line
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# CSV exports of the complaints table carry the jsonb columns as JSON text
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            for column in JSON_COLUMNS:
+                if isinstance(row.get(column), str) and row[column].startswith("{"):
+                    row[column] = json.loads(row[column])
+            yield row
+
+# Keyset pages in ticket_id order from the configured storage backend
+def read_storage():
+    ticket_id = None
+    while True:
+        rows = get_repository().complaints_after(ticket_id, PAGE_SIZE)
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            break
+        ticket_id = rows[-1]['ticket_id']
+
+def read_records(args):
+    if args.from_storage:
+        return read_storage()
+    if args.input.endswith(".csv"):
+        return read_csv(args.input)
+    return read_jsonl(args.input)
+
+# Keys of records already written by an earlier run
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+# English view of a complaint row (or flat complaint dict) as the categorizer expects it
+def english_complaint(record):
+    if isinstance(record.get('translated_data'), dict):
+        return dict(record['translated_data'])
+    # Flat complaint as filed: translate its text fields first if it was written in another language
+    return language.translate_batch(record, record.get('language', "English"), "English")
+
+# The record with its new category set in every JSON column that carries one
+def with_category(record, category, explanation):
+    updated = dict(record)
+    for column in JSON_COLUMNS:
+        if isinstance(updated.get(column), dict):
+            updated[column] = dict(updated[column], category=category, category_explanation=explanation)
+    if not isinstance(record.get('translated_data'), dict):
+        updated.update(category=category, category_explanation=explanation)
+    updated['last_updated'] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return updated
+
+# Re-categorize a pack of records: one Gemini call per record, or per pack when packing is enabled
+def categorize_records(records, use_local, pack_size):
+    complaints = [english_complaint(record) for record in records]
+    if pack_size > 1:
+        results = classifier.categorize_complaints_packed(complaints, use_local=use_local, pack_size=pack_size)
+    else:
+        results = [classifier.categorize_complaint(data, use_local=use_local) for data in complaints]
+    return [with_category(record, *result) for record, result in zip(records, results)]
+
+# Buffers results and writes them (output file and/or write-back) batch_size at a time, then checkpoints them
+class ResultWriter:
+    def __init__(self, args):
+        self.args = args
+        self.pending = []
+        self.output = open(args.output, "a", encoding="utf-8") if args.output else None
+        self.checkpoint = open(args.checkpoint, "a", encoding="utf-8")
+        self.written = 0
+
+    def add(self, keys, records):
+        self.pending.extend(zip(keys, records))
+        if len(self.pending) >= self.args.batch_size:
+            self.flush()
+
+    # Results first (one bulk write-back per batch), checkpoint second: a crash in between only repeats work
+    def flush(self):
+        if not self.pending:
+            return
+        records = [record for _, record in self.pending]
+        if self.args.write_back:
+            # Only stored complaint rows can be written back; flat complaints from an input file go to --output
+            stored = [record for record in records if record.get('ticket_id') and isinstance(record.get('translated_data'), dict)]
+            if stored:
+                get_repository().update_complaint_categories(stored)
+        if self.output:
+            for record in records:
+                self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.output.flush()
+        self.checkpoint.write("".join(f"{key}\n" for key, _ in self.pending))
+        self.checkpoint.flush()
+        self.written += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.output:
+            self.output.close()
+        self.checkpoint.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch (re-)categorize complaints outside the Streamlit app.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL or CSV export of complaints")
+    source.add_argument("--from-storage", "--from-supabase", dest="from_storage", action="store_true",
+                        help="page through the complaints table of the configured storage backend")
+    parser.add_argument("--output", help="append updated records to this JSONL file")
+    parser.add_argument("--write-back", action="store_true", help="write the new categories to the complaints table")
+    parser.add_argument("--checkpoint", default="batch_categorize.checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100, help="records per bulk write-back / checkpoint")
+    parser.add_argument("--pack-size", type=int, default=1,
+                        help=f"complaints per Gemini call (packed prompt), e.g. {config.CATEGORIZE_PACK_SIZE}")
+    parser.add_argument("--no-local", action="store_true", help="skip the local fast path and always ask Gemini")
+    args = parser.parse_args()
+    if not args.output and not args.write_back:
+        parser.error("nothing to do: pass --output and/or --write-back")
+
+    done = load_checkpoint(args.checkpoint)
+    writer = ResultWriter(args)
+    started = time.monotonic()
+    skipped = failed = 0
+    in_flight = {}
+
+    def drain(block_until):
+        nonlocal failed
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED) if len(in_flight) > block_until else (set(), None)
+        for future in finished:
+            keys = in_flight.pop(future)
+            try:
+                writer.add(keys, future.result())
+            except Exception as e:
+                failed += len(keys)
+                print(f"{', '.join(keys)}: failed ({e}); retried on the next run")
+
+    def submit(pack):
+        # Bounded submission keeps memory flat when streaming large exports
+        drain(args.concurrency * 2)
+        keys, records = zip(*pack)
+        in_flight[executor.submit(categorize_records, list(records), not args.no_local, args.pack_size)] = keys
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        pack = []
+        for line_number, record in enumerate(read_records(args), 1):
+            key = str(record.get('ticket_id') or f"line-{line_number}")
+            if key in done:
+                skipped += 1
+                continue
+            pack.append((key, record))
+            if len(pack) >= args.pack_size:
+                submit(pack)
+                pack = []
+        if pack:
+            submit(pack)
+        while in_flight:
+            drain(0)
+    writer.close()
+
+    elapsed = time.monotonic() - started
+    rate = writer.written / elapsed * 3600 if elapsed else 0.0
+    print(f"categorized {writer.written}, skipped {skipped} (checkpoint), failed {failed} "
+          f"in {elapsed:.1f}s ({rate:.0f} tickets/hour)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Train the local complaint categorization model from historical tickets.
+
+Usage:
+    python -m tools.train_category_model --input complaints.jsonl
+    python -m tools.train_category_model --from-storage
+
+--from-storage reads the complaints table of the storage backend selected by config.STORAGE_BACKEND.
+"""
+import argparse
+import json
+
+from cyberguard_core import classifier, config
+from cyberguard_core.storage import get_repository
+
+PAGE_SIZE = 1000
+
+# Accept either a raw `complaints` row or a flat complaint dict carrying its own `category`
+def labeled_complaint(record):
+    data = record.get('translated_data') or record
+    return data, data.get('category')
+
+# Labeled complaints from a JSONL export
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield labeled_complaint(json.loads(line))
+
+# Keyset pages in ticket_id order, so no row is skipped or read twice while tickets are being filed
+def read_storage():
+    ticket_id = None
+    while True:
+        rows = get_repository().complaints_after(ticket_id, PAGE_SIZE)
+        for row in rows:
+            yield labeled_complaint(row)
+        if len(rows) < PAGE_SIZE:
+            break
+        ticket_id = rows[-1]['ticket_id']
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the TF-IDF categorization model used by classify_locally.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL export of complaints (rows or flat complaint dicts with a category)")
+    source.add_argument("--from-storage", "--from-supabase", dest="from_storage", action="store_true",
+                        help="read historical tickets from the complaints table of the configured storage backend")
+    parser.add_argument("--output", default=config.CATEGORY_MODEL_PATH)
+    parser.add_argument("--max-terms", type=int, default=300, help="vocabulary kept per category centroid")
+    args = parser.parse_args()
+
+    records = read_storage() if args.from_storage else read_jsonl(args.input)
+    model = classifier.train_category_model(records, max_terms=args.max_terms)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(model, f)
+    print(f"Trained on {model['documents']} tickets, {len(model['idf'])} terms, "
+          f"categories: {', '.join(model['centroids'])} -> {args.output}")
+
+if __name__ == "__main__":
+    main()